@@ -1,8 +1,40 @@
 from enum import IntEnum
+import typing
+import weakref
 
-from PyQt6.QtCore import Qt
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
 from PyQt6.QtWidgets import QFrame, QHBoxLayout, QLabel, QPushButton, QVBoxLayout
 
+REFRESH_INTERVAL = 16 # Milliseconds to gather widget refreshes for, about one frame at 60 Hz
+DEVICE_REFRESH_INTERVAL = 100 # Milliseconds to gather device refreshes for, as devices advertise many times a second
+
+BASE_UUID = 0x0000000000001000800000805F9B34FB # 0000xxxx-0000-1000-8000-00805F9B34FB
+BASE_UUID_MASK = (1 << 96) - 1
+
+ALIGN_LEFT = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+ALIGN_CENTER = Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter
+ALIGN_RIGHT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+FRAME_STYLE = QFrame.Shape.Box | QFrame.Shadow.Raised
+
+def shorten_uuid(uuid: int) -> int:
+    """Shorten a UUID built from the Bluetooth Base UUID to its 16-bit form, giving well-known UUIDs a single value"""
+
+    if uuid & BASE_UUID_MASK == BASE_UUID and uuid >> 96 < 1 << 16:
+        return uuid >> 96
+
+    return uuid
+
+def parse_uuid(data: bytes) -> int:
+    """Parse a UUID sent over BGAPI, which is in little-endian byte order, and shorten it where possible"""
+
+    return shorten_uuid(int.from_bytes(data, "little"))
+
+def format_uuid(uuid: int) -> str:
+    """Format a UUID for display, 16-bit UUIDs are shown in their short form"""
+
+    return f"{uuid:04X}" if uuid < 1 << 16 else f"{uuid:032X}"
+
 class CharacteristicState(IntEnum):
     """enum for handling whether a characteristic is currently being used for a gatt command"""
 
@@ -12,16 +44,86 @@ class CharacteristicState(IntEnum):
     SUBSCRIBING_NOTIFICATION = 3
     SUBSCRIBING_INDICATION = 4
 
-class Characteristic: # pylint: disable=too-few-public-methods
+class Characteristic: # pylint: disable=too-few-public-methods, too-many-instance-attributes
     """Class for holding information pertaining to a Bluetooth characteristic"""
 
-    def __init__(self, uuid: str, handle: int, properties: int) -> None:
+    __slots__ = (
+        "uuid", "handle", "handle_str", "properties", "can_read", "can_write", "can_notify", "can_indicate", "_state",
+        "_packet", "_device", "_observers"
+    )
+
+    def __init__(self, uuid: int, handle: int, properties: int) -> None:
         self.uuid = uuid
         self.handle = handle
+        self.handle_str = f"[{handle:08X}]"
         self.properties = properties
 
-        self.state = CharacteristicState.NONE
-        self.packet = ""
+        self.can_read = properties & 0x02 != 0
+        self.can_write = properties & 0x08 != 0
+        self.can_notify = properties & 0x10 != 0
+        self.can_indicate = properties & 0x20 != 0
+
+        self._state = CharacteristicState.NONE
+        self._packet = b""
+
+        self._device: weakref.ref[Device] | None = None
+
+        # Callbacks for when the state or packet changes, these may be invoked from the BGAPI thread. The tuple is
+        # replaced rather than modified so that it can be iterated over while another thread adds or removes one.
+        self._observers: tuple[typing.Callable[[], None], ...] = ()
+
+    @property
+    def state(self) -> CharacteristicState:
+        """Current GATT command being performed on the characteristic"""
+
+        return self._state
+
+    @state.setter
+    def state(self, state: CharacteristicState) -> None:
+        device = self._device() if self._device is not None else None
+
+        if device is not None:
+            device.on_command_change(self, self._state != CharacteristicState.NONE, state != CharacteristicState.NONE)
+
+        self._state = state
+        self.notify_observers()
+
+    @property
+    def packet(self) -> bytes:
+        """Last value read, written or received for the characteristic"""
+
+        return self._packet
+
+    @packet.setter
+    def packet(self, packet: bytes) -> None:
+        self._packet = packet # Formatted by the widget as it refreshes, the packet may change many times in between
+        self.notify_observers()
+
+    def add_observer(self, observer: typing.Callable[[], None]) -> None:
+        """Add a callback to be invoked whenever the characteristic changes"""
+
+        self._observers = (*self._observers, observer)
+
+    def remove_observer(self, observer: typing.Callable[[], None]) -> None:
+        """Remove a callback that was previously added"""
+
+        self._observers = tuple(callback for callback in self._observers if callback != observer)
+
+    def notify_observers(self) -> None:
+        """Invoke all of the callbacks observing the characteristic"""
+
+        for observer in self._observers:
+            observer()
+
+    def attach(self, device: "Device") -> None:
+        """Attach the characteristic to the device that owns it so it can be notified of state changes"""
+
+        self._device = weakref.ref(device)
+
+    def detach(self) -> None:
+        """Detach the characteristic from the device that owned it"""
+
+        self._device = None
 
 class ServiceState(IntEnum):
     """enum for the current discovery state of a Service"""
@@ -29,42 +131,84 @@ class ServiceState(IntEnum):
     DISCOVERING = 1
     DISCOVERED = 2
 
-class Service:
+class Service: # pylint: disable=too-many-instance-attributes
     """Class for holding information pertaining to a Bluetooth service"""
 
-    def __init__(self, uuid: str, handle: int) -> None:
+    __slots__ = (
+        "uuid", "handle", "handle_str", "_state", "characteristics", "_char_by_uuid", "_char_by_handle", "_device"
+    )
+
+    def __init__(self, uuid: int, handle: int) -> None:
         self.uuid = uuid
         self.handle = handle
+        self.handle_str = f"[{handle:08X}]"
 
-        self.state = ServiceState.DISCOVERING
+        self._state = ServiceState.DISCOVERING
         self.characteristics: list[Characteristic] = []
 
-    def get_characteristic_by_uuid(self, uuid: str) -> Characteristic | None:
-        """Get the corresponding characteristic with the matching UUID"""
+        self._char_by_uuid: dict[int, Characteristic] = {}
+        self._char_by_handle: dict[int, Characteristic] = {}
 
-        for characteristic in self.characteristics:
-            if characteristic.uuid == uuid:
-                return characteristic
+        self._device: weakref.ref[Device] | None = None
 
-        return None
+    @property
+    def state(self) -> ServiceState:
+        """Current discovery state of the service"""
+
+        return self._state
+
+    @state.setter
+    def state(self, state: ServiceState) -> None:
+        device = self._device() if self._device is not None else None
+
+        if device is not None:
+            device.on_state_change(self._state != ServiceState.DISCOVERED, state != ServiceState.DISCOVERED)
+
+        self._state = state
+
+    def attach(self, device: "Device") -> None:
+        """Attach the service to the device that owns it so it can be notified of state changes"""
+
+        self._device = weakref.ref(device)
+
+    def detach(self) -> None:
+        """Detach the service from the device that owned it"""
+
+        self._device = None
+
+    def add_characteristic(self, characteristic: Characteristic) -> None:
+        """Add a characteristic to the service and index it for lookups"""
+
+        self.characteristics.append(characteristic)
+
+        # Keep the first characteristic registered under a UUID to match the order of discovery
+        self._char_by_uuid.setdefault(characteristic.uuid, characteristic)
+        self._char_by_handle.setdefault(characteristic.handle, characteristic)
+
+    def get_characteristic_by_uuid(self, uuid: int) -> Characteristic | None:
+        """Get the corresponding characteristic with the matching UUID"""
+
+        return self._char_by_uuid.get(uuid)
 
     def get_characteristic_by_handle(self, handle: int) -> Characteristic | None:
         """Get the corresponding characteristic with the matching handle"""
 
-        for characteristic in self.characteristics:
-            if characteristic.handle == handle:
-                return characteristic
-
-        return None
+        return self._char_by_handle.get(handle)
 
 class Device: # pylint: disable=too-many-instance-attributes
     """Class for holding information pertaining to a Bluetooth device"""
 
+    __slots__ = (
+        "address", "handle", "packet", "is_connectable", "address_type", "rssi", "is_connected", "services",
+        "_service_by_uuid", "_service_by_handle", "_char_by_uuid", "_char_by_handle", "_pending_ops",
+        "_active_characteristic", "_discovering_index", "has_primary_services", "needs_rediscovery", "__weakref__"
+    )
+
     def __init__(self, address: str) -> None:
         self.address = address
         self.handle: int | None = None
 
-        self.packet = ""
+        self.packet = b""
         self.is_connectable = False
         self.address_type: int | None = None
         self.rssi: int | None = None
@@ -72,70 +216,183 @@ class Device: # pylint: disable=too-many-instance-attributes
         self.is_connected = False
         self.services: list[Service] = []
 
-    def on_advertisement(self, packet: str, event_flags: int, address_type: int, rssi: int) -> None:
-        """Callback for when the device sends an advertisment packet"""
+        self._service_by_uuid: dict[int, Service] = {}
+        self._service_by_handle: dict[int, Service] = {}
+        self._char_by_uuid: dict[int, Characteristic] = {}
+        self._char_by_handle: dict[int, Characteristic] = {}
+
+        # Number of services still being discovered and characteristics with a GATT command in progress
+        self._pending_ops = 0
+
+        # Characteristic with a GATT command in progress, only one command can be in progress at a time
+        self._active_characteristic: Characteristic | None = None
+
+        # Services are discovered in order, so every service before this index has already been discovered
+        self._discovering_index = 0
+
+        # Whether the discovery of the primary services has completed, their characteristics are discovered afterwards
+        self.has_primary_services = False
+
+        # Whether the GATT database of the device has changed, its services are discovered again once it is idle
+        self.needs_rediscovery = False
+
+    def on_advertisement(self, packet: bytes, event_flags: int, address_type: int, rssi: int) -> bool:
+        """Callback for when the device sends an advertisment packet, returns whether the fields shown have changed"""
+
+        is_connectable = event_flags & 1 != 0
+        has_changed = rssi != self.rssi or is_connectable != self.is_connectable
 
         self.packet = packet
-        self.is_connectable = event_flags & 1 != 0
+        self.is_connectable = is_connectable
         self.address_type = address_type
         self.rssi = rssi
 
-    def get_service_by_uuid(self, uuid: str) -> Service | None:
-        """Get the corresponding service with the matching UUID"""
+        return has_changed
 
-        for service in self.services:
-            if service.uuid == uuid:
-                return service
+    def add_service(self, service: Service) -> None:
+        """Add a service to the device and index it, along with any of its characteristics, for lookups"""
 
-        return None
+        self.services.append(service)
 
-    def get_service_by_handle(self, handle: int) -> Service | None:
-        """Get the corresponding service with the matching handle"""
+        service.attach(self)
+        self.on_state_change(False, service.state != ServiceState.DISCOVERED)
 
-        for service in self.services:
-            if service.handle == handle:
-                return service
+        self._service_by_uuid.setdefault(service.uuid, service)
+        self._service_by_handle.setdefault(service.handle, service)
 
-        return None
+        for characteristic in service.characteristics:
+            self._register_characteristic(characteristic)
 
-    def get_characteristic_by_uuid(self, uuid: str) -> Characteristic | None:
-        """Get the corresponding characteristic with the matching UUID"""
+    def add_characteristic(self, service: Service, characteristic: Characteristic) -> None:
+        """Add a characteristic to one of the device's services and index it for lookups"""
+
+        service.add_characteristic(characteristic)
+        self._register_characteristic(characteristic)
+
+    def _register_characteristic(self, characteristic: Characteristic) -> None:
+        """Attach a characteristic to the device and index it across all services of the device"""
+
+        characteristic.attach(self)
+        self.on_command_change(characteristic, False, characteristic.state != CharacteristicState.NONE)
+
+        self._char_by_uuid.setdefault(characteristic.uuid, characteristic)
+        self._char_by_handle.setdefault(characteristic.handle, characteristic)
+
+    def clear_services(self) -> None:
+        """Remove all of the services, along with their characteristics, from the device"""
 
         for service in self.services:
+            service.detach()
+
             for characteristic in service.characteristics:
-                if characteristic.uuid == uuid:
-                    return characteristic
+                characteristic.detach()
 
-        return None
+        self.services.clear()
+
+        self._service_by_uuid.clear()
+        self._service_by_handle.clear()
+        self._char_by_uuid.clear()
+        self._char_by_handle.clear()
+
+        self._pending_ops = 0
+        self._active_characteristic = None
+        self._discovering_index = 0
+        self.has_primary_services = False
+        self.needs_rediscovery = False
+
+    def get_service_by_uuid(self, uuid: int) -> Service | None:
+        """Get the corresponding service with the matching UUID"""
+
+        return self._service_by_uuid.get(uuid)
+
+    def get_service_by_handle(self, handle: int) -> Service | None:
+        """Get the corresponding service with the matching handle"""
+
+        return self._service_by_handle.get(handle)
+
+    def get_characteristic_by_uuid(self, uuid: int) -> Characteristic | None:
+        """Get the corresponding characteristic with the matching UUID"""
+
+        return self._char_by_uuid.get(uuid)
 
     def get_characteristic_by_handle(self, handle: int) -> Characteristic | None:
         """Get the corresponding characteristic with the matching handle"""
 
-        for service in self.services:
-            for characteristic in service.characteristics:
-                if characteristic.handle == handle:
-                    return characteristic
+        return self._char_by_handle.get(handle)
 
-        return None
+    def on_state_change(self, was_pending: bool, is_pending: bool) -> None:
+        """Callback for when a service or characteristic of the device changes state"""
+
+        self._pending_ops += is_pending - was_pending
+
+    def on_command_change(self, characteristic: Characteristic, was_pending: bool, is_pending: bool) -> None:
+        """Callback for when a characteristic of the device starts or finishes a GATT command"""
+
+        self.on_state_change(was_pending, is_pending)
+
+        if is_pending:
+            self._active_characteristic = characteristic
+        elif self._active_characteristic is characteristic:
+            self._active_characteristic = None
 
     def is_using_gatt_command(self) -> bool:
         """Check whether a characteristic in the device is currently being read/written/subscribed to"""
 
+        return self._pending_ops != 0
+
+    def can_send_gatt_command(self, characteristic: Characteristic) -> bool:
+        """Check whether the device is connected and free to have a GATT command sent to one of its characteristics"""
+
+        # Characteristics removed when the services were cleared may no longer exist on the device
         return (
-            any(service.state != ServiceState.DISCOVERED for service in self.services) or
-            any(characteristic.state != CharacteristicState.NONE
-                for service in self.services
-                for characteristic in service.characteristics)
+            self.is_connected and self._pending_ops == 0 and
+            self._char_by_handle.get(characteristic.handle) is characteristic
         )
 
+    def is_discovered(self) -> bool:
+        """Check whether all of the services of the device have finished being discovered"""
+
+        return not self.needs_rediscovery and bool(self.services) and self.get_discovering_service() is None
+
+    def get_discovering_service(self) -> Service | None:
+        """Get the first service which still has its characteristics to be discovered"""
+
+        services = self.services
+
+        while self._discovering_index < len(services):
+            if services[self._discovering_index].state == ServiceState.DISCOVERING:
+                return services[self._discovering_index]
+
+            self._discovering_index += 1
+
+        return None
+
+    def get_resumable_service(self) -> Service | None:
+        """Get the service to resume an interrupted discovery from, None if the services themselves were not found"""
+
+        # A changed database is not resumed as its services may no longer exist
+        if self.needs_rediscovery or not self.has_primary_services:
+            return None
+
+        return self.get_discovering_service()
+
+    def clear_gatt_commands(self) -> None:
+        """Clear the state of the characteristic with a GATT command in progress, i.e. once it has completed"""
+
+        if (characteristic := self._active_characteristic) is not None:
+            characteristic.state = CharacteristicState.NONE
+
 class CharacteristicWidget(QFrame): # pragma: no cover, pylint: disable=too-many-instance-attributes
     """Widget for displaying Characteristic information in a GUI"""
 
-    def __init__(self, device: Device, characteristic: Characteristic) -> None:
+    def __init__( # pylint: disable=too-many-statements
+        self, device: Device, characteristic: Characteristic, scheduler: "RefreshScheduler"
+    ) -> None:
         super().__init__()
 
         self.device = device
         self.characteristic = characteristic
+        self.scheduler = scheduler
 
         self.uuid = QLabel()
         self.handle = QLabel()
@@ -147,25 +404,29 @@ class CharacteristicWidget(QFrame): # pragma: no cover, pylint: disable=too-many
 
         self.packet = QLabel()
 
-        self.uuid.setText(self.characteristic.uuid)
-        self.uuid.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+        self.uuid.setText(format_uuid(self.characteristic.uuid))
+        self.uuid.setAlignment(ALIGN_LEFT)
 
-        self.handle.setText(f"[{self.characteristic.handle:08X}]")
-        self.handle.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        self.handle.setText(self.characteristic.handle_str)
+        self.handle.setAlignment(ALIGN_RIGHT)
 
-        self.read_button.setEnabled(self.characteristic.properties & 0x02 != 0)
+        self.read_button.setText("R")
+        self.read_button.setEnabled(self.characteristic.can_read)
         self.read_button.setFixedSize(32, 32)
 
-        self.write_button.setEnabled(self.characteristic.properties & 0x08 != 0)
+        self.write_button.setText("W")
+        self.write_button.setEnabled(self.characteristic.can_write)
         self.write_button.setFixedSize(32, 32)
 
-        self.notify_button.setEnabled(self.characteristic.properties & 0x10 != 0)
+        self.notify_button.setText("N")
+        self.notify_button.setEnabled(self.characteristic.can_notify)
         self.notify_button.setFixedSize(32, 32)
 
-        self.indicate_button.setEnabled(self.characteristic.properties & 0x20 != 0)
+        self.indicate_button.setText("I")
+        self.indicate_button.setEnabled(self.characteristic.can_indicate)
         self.indicate_button.setFixedSize(32, 32)
 
-        self.packet.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+        self.packet.setAlignment(ALIGN_LEFT)
 
         row1 = QHBoxLayout()
         row1.addWidget(self.uuid)
@@ -186,31 +447,56 @@ class CharacteristicWidget(QFrame): # pragma: no cover, pylint: disable=too-many
         column.addLayout(row3)
 
         self.setLayout(column)
-        self.setFrameStyle(QFrame.Shape.Box | QFrame.Shadow.Raised)
+        self.setFrameStyle(FRAME_STYLE)
+
+        # The button, along with its label, for each GATT command state indexed by the value of the state
+        self.state_buttons: tuple[tuple[QPushButton, str] | None, ...] = (
+            None,
+            (self.read_button, "R"),
+            (self.write_button, "W"),
+            (self.notify_button, "N"),
+            (self.indicate_button, "I")
+        )
+
+        # The last values shown, so that only the fields which have changed get updated
+        self._last_state = CharacteristicState.NONE
+        self._last_packet = b""
+
+        self.characteristic.add_observer(self.on_characteristic_change)
+
+        # Stop observing once the widget is deleted, i.e. when the list containing it is cleared
+        self.destroyed.connect(lambda: characteristic.remove_observer(self.on_characteristic_change))
 
         self.update_layout()
 
+    def on_characteristic_change(self) -> None:
+        """Callback for when the Characteristic is modified, this may be invoked from the BGAPI thread"""
+
+        self.scheduler.schedule(self)
+
     def update_layout(self) -> None:
         """Update the layout with the information from the Characteristic class"""
 
-        self.read_button.setText("R")
-        self.write_button.setText("W")
-        self.notify_button.setText("N")
-        self.indicate_button.setText("I")
+        state = self.characteristic.state
+        packet = self.characteristic.packet
+
+        if state == self._last_state and packet == self._last_packet:
+            return
+
+        if state != self._last_state:
+            if (previous := self.state_buttons[self._last_state]) is not None:
+                button, label = previous
+                button.setText(label)
 
-        match self.characteristic.state:
-            case CharacteristicState.READING:
-                self.read_button.setText("R...")
-            case CharacteristicState.WRITING:
-                self.write_button.setText("W...")
-            case CharacteristicState.SUBSCRIBING_NOTIFICATION:
-                self.notify_button.setText("N...")
-            case CharacteristicState.SUBSCRIBING_INDICATION:
-                self.indicate_button.setText("I...")
+            if (current := self.state_buttons[state]) is not None:
+                button, label = current
+                button.setText(f"{label}...")
 
-        self.packet.setText(self.characteristic.packet)
+            self._last_state = state
 
-        self.update()
+        if packet != self._last_packet:
+            self.packet.setText(packet.hex().upper()) # Formatted from the packet compared, which may since have changed
+            self._last_packet = packet
 
 class ServiceWidget(QFrame): # pragma: no cover
     """Widget for displaying Service information in a GUI"""
@@ -224,18 +510,18 @@ class ServiceWidget(QFrame): # pragma: no cover
         self.uuid = QLabel()
         self.handle = QLabel()
 
-        self.uuid.setText(self.service.uuid)
-        self.uuid.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+        self.uuid.setText(format_uuid(self.service.uuid))
+        self.uuid.setAlignment(ALIGN_LEFT)
 
-        self.handle.setText(f"[{self.service.handle:08X}]")
-        self.handle.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        self.handle.setText(self.service.handle_str)
+        self.handle.setAlignment(ALIGN_RIGHT)
 
         row = QHBoxLayout()
         row.addWidget(self.uuid)
         row.addWidget(self.handle)
 
         self.setLayout(row)
-        self.setFrameStyle(QFrame.Shape.Box | QFrame.Shadow.Raised)
+        self.setFrameStyle(FRAME_STYLE)
 
 class DeviceWidget(QFrame): # pragma: no cover
     """Widget for displaying Device information in a GUI"""
@@ -249,37 +535,93 @@ class DeviceWidget(QFrame): # pragma: no cover
         self.address = QLabel()
         self.button = QPushButton()
 
-        self.rssi.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+        self.rssi.setAlignment(ALIGN_LEFT)
         self.rssi.setFixedSize(56, 16)
 
-        self.address.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-        self.address.setText(self.device.address)
+        self.address.setAlignment(ALIGN_LEFT)
+        self.address.setText(self.device.address.upper())
         self.address.setFixedSize(112, 16)
 
         self.button.setFixedSize(84, 24)
 
+        # The last values shown, so that only the fields which have changed get updated
+        self._last_rssi = ""
+        self._last_button = ""
+        self._last_enabled: bool | None = None
+
         row = QHBoxLayout()
         row.addWidget(self.rssi)
         row.addWidget(self.address)
         row.addWidget(self.button)
 
         self.setLayout(row)
-        self.setFrameStyle(QFrame.Shape.Box | QFrame.Shadow.Raised)
+        self.setFrameStyle(FRAME_STYLE)
 
         self.update_layout()
 
     def update_layout(self) -> None:
         """Update the layout with the information from the Device class"""
 
-        self.rssi.setText(f"{self.device.rssi} dBm" if self.device.rssi is not None else "N/A")
+        rssi = f"{self.device.rssi} dBm" if self.device.rssi is not None else "N/A"
 
         if self.device.is_connected:
-            self.button.setText("Disconnect")
+            button = "Disconnect"
         elif self.device.handle is not None:
-            self.button.setText("Connecting...")
+            button = "Connecting..."
         else:
-            self.button.setText("Connect")
+            button = "Connect"
+
+        is_enabled = self.device.is_connectable
+
+        if rssi != self._last_rssi:
+            self.rssi.setText(rssi)
+            self._last_rssi = rssi
+
+        if button != self._last_button:
+            self.button.setText(button)
+            self._last_button = button
+
+        if is_enabled != self._last_enabled:
+            self.button.setEnabled(is_enabled)
+            self._last_enabled = is_enabled
+
+class RefreshScheduler(QObject): # pragma: no cover
+    """Gathers widgets needing a refresh so that a burst of changes results in a single refresh per frame"""
+
+    requested = pyqtSignal(object)
+
+    def __init__(self, parent: QObject | None = None, interval: int = REFRESH_INTERVAL) -> None:
+        super().__init__(parent)
+
+        self.widgets: set[CharacteristicWidget | DeviceWidget] = set()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.refresh)
+
+        # Signals emitted from another thread are queued, allowing the BGAPI thread to request a refresh
+        self.requested.connect(self.on_requested)
+
+    def schedule(self, widget: CharacteristicWidget | DeviceWidget) -> None:
+        """Request for a widget to be refreshed on the next frame, this may be called from any thread"""
+
+        self.requested.emit(widget)
+
+    def on_requested(self, widget: CharacteristicWidget | DeviceWidget) -> None:
+        """Callback for when a widget has requested to be refreshed"""
+
+        self.widgets.add(widget)
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def refresh(self) -> None:
+        """Refresh all of the widgets which have requested it since the last frame"""
 
-        self.button.setEnabled(self.device.is_connectable)
+        widgets, self.widgets = self.widgets, set()
 
-        self.update()
+        for widget in widgets:
+            # Widgets are deleted when their list gets cleared, which may happen before the refresh
+            if not sip.isdeleted(widget):
+                widget.update_layout()
@@ -1,12 +1,19 @@
+import logging
+import os
 import sys
 
 from PyQt6.QtWidgets import QApplication
 
-from scanner import ScannerWidget
+from scanner import LOGGER, ScannerWidget
 
 def main() -> None:
     """Create the GUI"""
 
+    # Events received from the BGM220 Explorer Kit are logged when debugging
+    if os.environ.get("AQUAMARINE_DEBUG") == "1":
+        logging.basicConfig()
+        LOGGER.setLevel(logging.DEBUG)
+
     app = QApplication(sys.argv)
 
     window = ScannerWidget()
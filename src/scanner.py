@@ -1,9 +1,10 @@
+import logging
 import os
 import threading
 import typing
 
 import bgapi
-from PyQt6.QtCore import Qt, QRegularExpression, QTimer
+from PyQt6.QtCore import QObject, QRegularExpression, QTimer, pyqtSignal
 from PyQt6.QtGui import QCloseEvent, QFont, QIcon, QRegularExpressionValidator
 from PyQt6.QtWidgets import (
     QDialog, QHBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem, QPushButton, QWidget, QVBoxLayout
@@ -11,37 +12,83 @@ from PyQt6.QtWidgets import (
 import serial.tools.list_ports
 
 from device import (
-    Characteristic, CharacteristicState, CharacteristicWidget, Device, DeviceWidget, Service, ServiceState,
-    ServiceWidget
+    ALIGN_CENTER, ALIGN_RIGHT, DEVICE_REFRESH_INTERVAL, REFRESH_INTERVAL, Characteristic, CharacteristicState,
+    CharacteristicWidget, Device, DeviceWidget, RefreshScheduler, Service, ServiceState, ServiceWidget, parse_uuid
 )
 
+LOGGER = logging.getLogger(__name__)
+
 MAX_RETRY_ATTEMPTS = 3
+EVENT_TIMEOUT = 1.0 # Seconds to wait for an event, allows for keyboard interrupts when running without the GUI
+SERVICE_CHANGED_UUID = 0x2A05 # Indicated by a device when its GATT database has been modified
 
-class ScannerApp(threading.Thread):
-    """Thread for handling event callbacks on the BGM220 Explorer Kit"""
+RES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../res")
+API_PATH = os.path.join(RES_DIRECTORY, "sl_bt.xapi")
+ICON_PATH = os.path.join(RES_DIRECTORY, "icon.ico")
 
-    def __init__(self) -> None:
-        super().__init__(daemon=True)
+@typing.no_type_check
+def get_port_of_module() -> str:
+    """Grab the serial port of the BGM220 Explorer Kit"""
+
+    port = next((port for port, desc, _ in serial.tools.list_ports.comports() if "JLink CDC UART" in desc), None)
+
+    if port is None:
+        raise ValueError("BGM220 Explorer Kit not detected!")
 
-        @typing.no_type_check
-        def get_port_of_module() -> str:
-            """Grab the serial port of the BGM220 Explorer Kit"""
+    return port
 
-            for port, desc, _ in serial.tools.list_ports.comports():
-                if "JLink CDC UART" in desc:
-                    return port
+class ScannerSignals(QObject): # pylint: disable=too-few-public-methods
+    """Signals for notifying the GUI of changes made by the BGM220 Explorer Kit, these are emitted from its thread"""
 
-            raise ValueError("BGM220 Explorer Kit not detected!")
+    device_added = pyqtSignal(object)
+    device_changed = pyqtSignal(object)
+    services_changed = pyqtSignal(object)
+    services_cleared = pyqtSignal(object)
+
+class ScannerApp(threading.Thread): # pylint: disable=too-many-instance-attributes, too-many-public-methods
+    """Thread for handling event callbacks on the BGM220 Explorer Kit"""
+
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
 
         port = get_port_of_module()
-        path_to_api = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../res/sl_bt.xapi")
 
+        # Addresses are kept in the lowercase form reported by BGAPI so that events can be matched without conversion
         self.devices: list[Device] = []
+        self._by_address: dict[str, Device] = {}
+        self._by_handle: dict[int, Device] = {}
+
+        self.signals = ScannerSignals()
+
+        self.lib = bgapi.BGLib(bgapi.SerialConnector(port, rtscts=True), API_PATH)
+
+        # The commands and constants of the API never change, so they are looked up once rather than on every event
+        gatt = self.lib.bt.gatt
+        self._att_opcode_indication = gatt.ATT_OPCODE_HANDLE_VALUE_INDICATION
+        self._send_confirmation = gatt.send_characteristic_confirmation
+        self._discover_services = gatt.discover_primary_services
+        self._discover_characteristics = gatt.discover_characteristics
+        self._read_characteristic = gatt.read_characteristic_value
+        self._write_characteristic = gatt.write_characteristic_value
+        self._set_notification = gatt.set_characteristic_notification
+        self._open_connection = self.lib.bt.connection.open
+        self._close_connection = self.lib.bt.connection.close
+        self._phy_1m = self.lib.bt.gap.PHY_PHY_1M
 
-        self.lib = bgapi.BGLib(bgapi.SerialConnector(port, rtscts=True), path_to_api)
         self.is_running = threading.Event()
         self.is_ready = threading.Event()
 
+        self.handlers: dict[str, typing.Callable[[bgapi.bglib.BGEvent], None]] = {
+            "bt_evt_scanner_legacy_advertisement_report": self.on_advertisement,
+            "bt_evt_system_boot": lambda _: self.on_boot(),
+            "bt_evt_connection_opened": self.on_connection_opened,
+            "bt_evt_connection_closed": self.on_connection_closed,
+            "bt_evt_gatt_service": self.on_service,
+            "bt_evt_gatt_characteristic": self.on_characteristic,
+            "bt_evt_gatt_characteristic_value": self.on_characteristic_value,
+            "bt_evt_gatt_procedure_completed": self.on_procedure_completed
+        }
+
     def run(self) -> None: # pragma: no cover
         """Thread for handling events of the BGM220"""
 
@@ -51,47 +98,41 @@ class ScannerApp(threading.Thread):
 
         while self.is_running.is_set():
             try:
-                # In order to allow for keyboard interrupts when running without the GUI a timeout is included
-                event = self.lib.get_event(timeout=0.1)
-
-                if event is None:
-                    continue
-
-                # For easier debugging, advertisements can clutter the console
-                if not event == "bt_evt_scanner_legacy_advertisement_report":
-                    print(event)
-
-                # We do not want to handle events until after the system is ready, however in order to be ready the boot
-                # event does need to get handled.
-                if not (self.is_ready.is_set() or event == "bt_evt_system_boot"):
-                    continue
-
-                match event:
-                    case "bt_evt_scanner_legacy_advertisement_report":
-                        self.on_advertisement(event)
-                    case "bt_evt_system_boot":
-                        self.on_boot()
-                    case "bt_evt_connection_opened":
-                        self.on_connection_opened(event)
-                    case "bt_evt_connection_closed":
-                        self.on_connection_closed(event)
-                    case "bt_evt_gatt_service":
-                        self.on_service(event)
-                    case "bt_evt_gatt_characteristic":
-                        self.on_characteristic(event)
-                    case "bt_evt_gatt_characteristic_value":
-                        self.on_characteristic_value(event)
-                    case "bt_evt_gatt_procedure_completed":
-                        self.on_procedure_completed(event)
+                # Stopping the thread wakes it with an empty event, so the timeout can be long
+                event = self.lib.get_event(timeout=EVENT_TIMEOUT)
+
+                # Events which have queued up behind the first are handled without waiting again
+                while event is not None and self.is_running.is_set():
+                    self.handle_event(event)
+                    event = self.lib.get_event()
             except KeyboardInterrupt:
                 self.is_running.clear()
 
         self.lib.close()
 
+    def handle_event(self, event: bgapi.bglib.BGEvent) -> None:
+        """Pass an event from the BGM220 Explorer Kit to its callback"""
+
+        # Comparing an event to a string formats its name each time, so the name is only formatted once
+        name = event._str # pylint: disable=protected-access
+
+        # For easier debugging, advertisements can clutter the console. The event is only formatted when enabled.
+        if name != "bt_evt_scanner_legacy_advertisement_report":
+            LOGGER.debug("%s", event)
+
+        # We do not want to handle events until after the system is ready, however in order to be ready the boot event
+        # does need to get handled.
+        if not (self.is_ready.is_set() or name == "bt_evt_system_boot"):
+            return
+
+        if (handler := self.handlers.get(name)) is not None:
+            handler(event)
+
     def stop(self) -> None:
         """Terminate the main loop"""
 
         self.is_running.clear()
+        self.lib.event_queue.put(None) # Wake the main loop if it is waiting for an event
 
     def watchdog(self) -> None: # pragma: no cover
         """Task for waiting for the BGM220 Explorer Kit to reboot"""
@@ -118,19 +159,21 @@ class ScannerApp(threading.Thread):
     def on_advertisement(self, event: bgapi.bglib.BGEvent) -> None:
         """Callback for when the BGM220 Explorer Kit receives an advertisement"""
 
-        address = event.address.upper()
+        address = event.address
 
-        packet = event.data.hex().upper()
+        packet = event.data
         event_flags = event.event_flags
         address_type = event.address_type
         rssi = event.rssi
 
-        device = self.get_device_by_address(address)
+        device = self._by_address.get(address)
 
         if device is None:
-            self.devices.append(device := Device(address))
+            self.add_device(device := Device(address))
 
-        device.on_advertisement(packet, event_flags, address_type, rssi)
+        # Advertisements are the most frequent event, so the GUI is only notified when the fields it shows change
+        if device.on_advertisement(packet, event_flags, address_type, rssi):
+            self.signals.device_changed.emit(device)
 
     def on_boot(self) -> None:
         """Callback for when the BGM220 Explorer Kit boots"""
@@ -144,11 +187,22 @@ class ScannerApp(threading.Thread):
     def on_connection_opened(self, event: bgapi.bglib.BGEvent) -> None:
         """Callback for when the BGM220 Explorer Kit receives a connection opened event"""
 
-        device = self.get_device_by_address(event.address.upper())
+        device = self.get_device_by_address(event.address)
 
         if device is not None:
             device.is_connected = True
-            self.lib.bt.gatt.discover_primary_services(event.connection)
+            self.signals.device_changed.emit(device)
+
+            # The GATT database of a device is kept between connections, so it only needs to be discovered once. An
+            # interrupted discovery is resumed from the service it stopped at.
+            if device.is_discovered():
+                self.subscribe_to_service_changed(device)
+                return
+
+            if (service := device.get_resumable_service()) is not None:
+                self._discover_characteristics(event.connection, service.handle)
+            else:
+                self.rediscover_services(device, event.connection)
 
     def on_connection_closed(self, event: bgapi.bglib.BGEvent) -> None:
         """Callback for when the BGM220 Explorer Kit receives a connection closed event"""
@@ -156,14 +210,18 @@ class ScannerApp(threading.Thread):
         device = self.get_device_by_handle(event.connection)
 
         if device is not None:
+            del self._by_handle[event.connection]
+
             device.is_connected = False
             device.handle = None
+            device.clear_gatt_commands()
+            self.signals.device_changed.emit(device)
 
     def on_characteristic_value(self, event: bgapi.bglib.BGEvent) -> None:
         """Callback for when the BGM220 Explorer Kit receives a characteristic value event"""
 
-        if event.att_opcode == self.lib.bt.gatt.ATT_OPCODE_HANDLE_VALUE_INDICATION:
-            self.lib.bt.gatt.send_characteristic_confirmation(event.connection)
+        if event.att_opcode == self._att_opcode_indication:
+            self._send_confirmation(event.connection)
 
         device = self.get_device_by_handle(event.connection)
 
@@ -171,7 +229,14 @@ class ScannerApp(threading.Thread):
             characteristic = device.get_characteristic_by_handle(event.characteristic)
 
             if characteristic is not None:
-                characteristic.packet = event.value.hex()
+                characteristic.packet = event.value
+
+                # Only one procedure can be in progress, so the discovery waits for the current one to complete
+                if characteristic.uuid == SERVICE_CHANGED_UUID:
+                    if device.is_using_gatt_command():
+                        device.needs_rediscovery = True
+                    else:
+                        self.rediscover_services(device, event.connection)
 
     def on_service(self, event: bgapi.bglib.BGEvent) -> None:
         """Callback for when the BGM220 Explorer Kit receives a discovered service event"""
@@ -179,8 +244,9 @@ class ScannerApp(threading.Thread):
         device = self.get_device_by_handle(event.connection)
 
         if device is not None:
-            uuid = event.uuid[::-1].hex().upper()
-            device.services.append(Service(uuid, event.service))
+            uuid = parse_uuid(event.uuid)
+            device.add_service(Service(uuid, event.service))
+            self.signals.services_changed.emit(device)
 
     def on_characteristic(self, event: bgapi.bglib.BGEvent) -> None:
         """Callback for when the BGM220 Explorer Kit receives a discovered characteristic event"""
@@ -188,38 +254,53 @@ class ScannerApp(threading.Thread):
         device = self.get_device_by_handle(event.connection)
 
         if device is not None:
-            uuid = event.uuid[::-1].hex().upper()
+            uuid = parse_uuid(event.uuid)
+            service = device.get_discovering_service()
 
-            for service in device.services:
-                if service.state == ServiceState.DISCOVERING:
-                    service.characteristics.append(Characteristic(uuid, event.characteristic, event.properties))
-                    return
+            # Characteristics found before an interrupted discovery are reported again when it is resumed
+            if service is not None and device.get_characteristic_by_handle(event.characteristic) is None:
+                device.add_characteristic(service, Characteristic(uuid, event.characteristic, event.properties))
+                self.signals.services_changed.emit(device)
 
     def on_procedure_completed(self, event: bgapi.bglib.BGEvent) -> None:
         """Callback for when the BGM220 Explorer Kit receives a procedure completed event"""
 
-        def update_services_and_characteristics(device: Device) -> None:
-            """Update the state for the currently active service or characteristic"""
+        device = self.get_device_by_handle(event.connection)
 
-            for service in device.services:
-                if service.state != ServiceState.DISCOVERED:
-                    service.state = ServiceState.DISCOVERED
-                    return
+        if device is not None:
+            # The procedure was either the discovery of the primary services, the discovery of the current service, or a
+            # GATT command of which only one can be in progress once all of the services have been discovered
+            discovered = device.get_discovering_service() if device.has_primary_services else None
 
-                for characteristic in service.characteristics:
-                    if characteristic.state != CharacteristicState.NONE:
-                        characteristic.state = CharacteristicState.NONE
-                        return
+            if not device.has_primary_services:
+                device.has_primary_services = True
+            elif discovered is not None:
+                discovered.state = ServiceState.DISCOVERED
+            elif device.is_using_gatt_command():
+                device.clear_gatt_commands()
 
-        device = self.get_device_by_handle(event.connection)
+            if device.needs_rediscovery:
+                self.rediscover_services(device, event.connection)
+            elif (service := device.get_discovering_service()) is not None:
+                self._discover_characteristics(device.handle, service.handle)
+            elif discovered is not None:
+                self.subscribe_to_service_changed(device) # The last service has been discovered
 
-        if device is not None:
-            update_services_and_characteristics(device)
+    def rediscover_services(self, device: Device, connection: int) -> None:
+        """Remove the services of a device and discover them again, once no procedure is in progress for it"""
 
-            for service in device.services:
-                if service.state == ServiceState.DISCOVERING:
-                    self.lib.bt.gatt.discover_characteristics(device.handle, service.handle)
-                    break
+        device.clear_services()
+        self.signals.services_cleared.emit(device)
+        self._discover_services(connection)
+
+    def subscribe_to_service_changed(self, device: Device) -> None:
+        """Subscribe to the Service Changed indication of a device, which invalidates its discovered services"""
+
+        # Devices are not bonded, so the subscription does not persist and is made again on every connection
+        characteristic = device.get_characteristic_by_uuid(SERVICE_CHANGED_UUID)
+
+        if characteristic is not None and characteristic.can_indicate:
+            self.subscribe_to_indication(device, characteristic)
 
     def connect_device(self, device: Device) -> None:
         """Connect the device to the BGM220 Explorer Kit"""
@@ -228,8 +309,10 @@ class ScannerApp(threading.Thread):
         if any(device.handle is not None and not device.is_connected for device in self.devices):
             return
 
-        response = self.lib.bt.connection.open(device.address, device.address_type, self.lib.bt.gap.PHY_PHY_1M)
+        response = self._open_connection(device.address, device.address_type, self._phy_1m)
         device.handle = response.connection
+        self._by_handle[device.handle] = device
+        self.signals.device_changed.emit(device)
 
         #TODO: Set a timer to check if the device has connected, otherwise the kit will be stuck attempting
 
@@ -237,66 +320,57 @@ class ScannerApp(threading.Thread):
         """Disconnect the device from the BGM220 Explorer Kit"""
 
         if device.handle is not None:
-            self.lib.bt.connection.close(device.handle)
+            self._close_connection(device.handle)
 
     def read_from_characteristic(self, device: Device, characteristic: Characteristic) -> None:
         """Read from a device connected to the BGM220 Explorer Kit"""
 
-        if device.is_using_gatt_command():
-            return
-
-        if device.is_connected:
-            self.lib.bt.gatt.read_characteristic_value(device.handle, characteristic.handle)
+        if device.can_send_gatt_command(characteristic):
+            self._read_characteristic(device.handle, characteristic.handle)
             characteristic.state = CharacteristicState.READING
 
-    def write_to_characteristic(self, device: Device, characteristic: Characteristic, packet: str) -> None:
+    def write_to_characteristic(self, device: Device, characteristic: Characteristic, packet: bytes) -> None:
         """Write to a device connected to the BGM220 Explorer Kit"""
 
-        if device.is_using_gatt_command():
-            return
-
-        if device.is_connected:
-            self.lib.bt.gatt.write_characteristic_value(device.handle, characteristic.handle, bytes.fromhex(packet))
+        if device.can_send_gatt_command(characteristic):
+            self._write_characteristic(device.handle, characteristic.handle, packet)
             characteristic.state = CharacteristicState.WRITING
             characteristic.packet = packet
 
     def subscribe_to_notification(self, device: Device, characteristic: Characteristic) -> None:
         """Subscribe to a device's notification connected to the BGM220 Explorer Kit"""
 
-        if device.is_using_gatt_command():
-            return
-
-        if device.is_connected:
-            self.lib.bt.gatt.set_characteristic_notification(device.handle, characteristic.handle, 1)
+        if device.can_send_gatt_command(characteristic):
+            self._set_notification(device.handle, characteristic.handle, 1)
             characteristic.state = CharacteristicState.SUBSCRIBING_NOTIFICATION
 
     def subscribe_to_indication(self, device: Device, characteristic: Characteristic) -> None:
         """Subscribe to a device's indication connected to the BGM220 Explorer Kit"""
 
-        if device.is_using_gatt_command():
-            return
-
-        if device.is_connected:
-            self.lib.bt.gatt.set_characteristic_notification(device.handle, characteristic.handle, 2)
+        if device.can_send_gatt_command(characteristic):
+            self._set_notification(device.handle, characteristic.handle, 2)
             characteristic.state = CharacteristicState.SUBSCRIBING_INDICATION
 
+    def add_device(self, device: Device) -> None:
+        """Add a device to the list of devices seen by the BGM220 Explorer Kit"""
+
+        self.devices.append(device)
+        self._by_address[device.address] = device
+
+        if device.handle is not None:
+            self._by_handle[device.handle] = device
+
+        self.signals.device_added.emit(device)
+
     def get_device_by_address(self, address: str) -> Device | None:
         """Get the corresponding device with the matching address"""
 
-        for device in self.devices:
-            if device.address == address:
-                return device
-
-        return None
+        return self._by_address.get(address)
 
     def get_device_by_handle(self, handle: int) -> Device | None:
         """Get the corresponding device with the matching handle"""
 
-        for device in self.devices:
-            if device.handle == handle:
-                return device
-
-        return None
+        return self._by_handle.get(handle)
 
 class HeaderWidget(QWidget): # pragma: no cover
     """Widget for a header on top of list widgets for navigation"""
@@ -316,7 +390,7 @@ class HeaderWidget(QWidget): # pragma: no cover
 
         self.label.setFont(font)
         self.label.setText("Devices")
-        self.label.setAlignment(Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter)
+        self.label.setAlignment(ALIGN_CENTER)
 
         row = QHBoxLayout()
         row.addWidget(self.button)
@@ -327,20 +401,26 @@ class HeaderWidget(QWidget): # pragma: no cover
 class WriteDialog(QDialog): # pragma: no cover
     """Widget for handling creating hex packets for writing to characteristics"""
 
+    # Shared between dialogs so that the expression is only created and compiled once
+    validator: typing.ClassVar[QRegularExpressionValidator | None] = None
+
     def __init__(self) -> None:
         super().__init__()
 
         self.has_accepted = False
-        self.packet = ""
+        self.packet = b""
 
         self.label = QLabel()
         self.edit = QLineEdit()
         self.accept_button = QPushButton()
 
         self.label.setText("HEX:")
-        self.label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        self.label.setAlignment(ALIGN_RIGHT)
+
+        if WriteDialog.validator is None:
+            WriteDialog.validator = QRegularExpressionValidator(QRegularExpression("[0-9a-fA-F]+"))
 
-        self.edit.setValidator(QRegularExpressionValidator(QRegularExpression("[0-9a-fA-F]+")))
+        self.edit.setValidator(WriteDialog.validator)
 
         self.accept_button.setText("Accept")
         self.accept_button.clicked.connect(self.on_accept)
@@ -358,27 +438,34 @@ class WriteDialog(QDialog): # pragma: no cover
         """Callback for when the accept button is pushed"""
 
         self.has_accepted = True
-        self.packet = self.edit.text().upper()
+        text = self.edit.text()
 
-        if len(self.packet)%2 != 0:
-            self.packet = "0" + self.packet
+        if len(text)%2 != 0:
+            text = "0" + text
+
+        self.packet = bytes.fromhex(text)
 
         self.close()
 
-class ScannerWidget(QWidget): # pragma: no cover
+class ScannerWidget(QWidget): # pragma: no cover, pylint: disable=too-many-instance-attributes
     """GUI for handling communication between devices and BGM220 Explorer Kit"""
 
     def __init__(self) -> None:
         super().__init__()
 
         self.app = ScannerApp()
-        self.app.start()
+        self.scheduler = RefreshScheduler(self)
+        self.device_scheduler = RefreshScheduler(self, DEVICE_REFRESH_INTERVAL)
+        self.device_widgets: dict[Device, DeviceWidget] = {}
+
+        # Identities of the services and characteristics currently shown in their lists
+        self._service_ids: set[int] = set()
+        self._characteristic_ids: set[int] = set()
 
         self.setWindowTitle("Aquamarine")
         self.setFixedSize(360, 480)
 
-        path_to_icon = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../res/icon.ico")
-        self.setWindowIcon(QIcon(path_to_icon))
+        self.setWindowIcon(QIcon(ICON_PATH))
 
         self.header = HeaderWidget()
         self.devices = QListWidget()
@@ -399,44 +486,90 @@ class ScannerWidget(QWidget): # pragma: no cover
         column.addWidget(self.characteristics)
         self.setLayout(column)
 
-        # Create a timer for active rendering of the GUI - no need to be fast
-        timer = QTimer(self)
-        timer.timeout.connect(self.update_layout)
-        timer.start(100)
+        # Discovery reports services and characteristics in bursts, so the lists are only updated once per frame
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.update_layout)
+
+        # The signals are emitted from the ScannerApp's thread, so they are queued to be handled on the GUI thread
+        self.app.signals.device_added.connect(self.on_device_added)
+        self.app.signals.device_changed.connect(self.on_device_changed)
+        self.app.signals.services_changed.connect(self.on_services_changed)
+        self.app.signals.services_cleared.connect(self.on_services_cleared)
+
+        self.app.start()
+
+    def on_device_added(self, device: Device) -> None:
+        """Callback for when the ScannerApp has found a new device"""
+
+        item = QListWidgetItem()
+        widget = DeviceWidget(device)
+
+        widget.button.clicked.connect(self.on_connect_button)
+
+        item.setSizeHint(widget.minimumSizeHint())
+
+        self.devices.addItem(item)
+        self.devices.setItemWidget(item, widget)
+        self.device_widgets[device] = widget
+
+    def on_device_changed(self, device: Device) -> None:
+        """Callback for when the advertisement or connection of a device has changed"""
+
+        if (widget := self.device_widgets.get(device)) is not None:
+            self.device_scheduler.on_requested(widget)
 
     @typing.no_type_check
-    def update_layout(self) -> None:
-        """Update the GUI based on data from the ScannerApp"""
+    def on_services_changed(self, device: Device) -> None:
+        """Callback for when services or characteristics have been discovered for a device"""
 
-        # Update all of the existing widgets in the lists
-        for i in range(self.devices.count()):
-            self.devices.itemWidget(self.devices.item(i)).update_layout()
+        # The lists of services and characteristics are rebuilt whenever they are shown, so there is nothing to update
+        # while the devices are being shown
+        if self.devices.isVisible() or self.timer.isActive():
+            return
 
-        for i in range(self.characteristics.count()):
-            self.characteristics.itemWidget(self.characteristics.item(i)).update_layout()
+        device_widget = self.devices.itemWidget(self.devices.currentItem())
 
-        # Add remaining missing device widgets to the list
-        devices = [self.devices.itemWidget(self.devices.item(i)).device for i in range(self.devices.count())]
-        for device in self.app.devices:
-            if device not in devices:
-                item = QListWidgetItem()
-                widget = DeviceWidget(device)
+        if device_widget is not None and device_widget.device is device:
+            self.timer.start()
 
-                widget.button.clicked.connect(self.on_connect_button)
+    @typing.no_type_check
+    def on_services_cleared(self, device: Device) -> None:
+        """Callback for when the services and characteristics of a device have been removed"""
 
-                item.setSizeHint(widget.minimumSizeHint())
+        device_widget = self.devices.itemWidget(self.devices.currentItem())
 
-                self.devices.addItem(item)
-                self.devices.setItemWidget(item, widget)
+        if self.devices.isVisible() or device_widget is None or device_widget.device is not device:
+            return
+
+        # The widgets shown refer to the removed services and characteristics, so both lists are rebuilt from scratch
+        self.services.clear()
+        self._service_ids.clear()
+        self.characteristics.clear()
+        self._characteristic_ids.clear()
+
+        # The service being shown no longer exists, so the view goes back to the services of the device
+        if self.characteristics.isVisible():
+            self.on_back_button()
+        else:
+            self.update_layout()
+
+    @typing.no_type_check
+    def update_layout(self) -> None:
+        """Add the services or characteristics of the current selection that are missing from the shown list"""
 
-        # Add services based on the currently selected device
-        services = [self.services.itemWidget(self.services.item(i)).service for i in range(self.services.count())]
         device_widget = self.devices.itemWidget(self.devices.currentItem())
-        if device_widget is not None:
+        service_widget = self.services.itemWidget(self.services.currentItem())
+
+        # Add services based on the currently selected device
+        if self.services.isVisible() and device_widget is not None:
             device = device_widget.device
 
             for service in device.services:
-                if service not in services:
+                if id(service) not in self._service_ids:
+                    self._service_ids.add(id(service))
+
                     item = QListWidgetItem()
                     widget = ServiceWidget(device, service)
 
@@ -446,16 +579,16 @@ class ScannerWidget(QWidget): # pragma: no cover
                     self.services.setItemWidget(item, widget)
 
         # Add characteristics based on the currently selected service
-        characteristics = [self.characteristics.itemWidget(self.characteristics.item(i)).characteristic
-                           for i in range(self.characteristics.count())]
-        service_widget = self.services.itemWidget(self.services.currentItem())
-        if service_widget is not None:
+        elif self.characteristics.isVisible() and service_widget is not None:
+            device = service_widget.device
             service = service_widget.service
 
             for characteristic in service.characteristics:
-                if characteristic not in characteristics:
+                if id(characteristic) not in self._characteristic_ids:
+                    self._characteristic_ids.add(id(characteristic))
+
                     item = QListWidgetItem()
-                    widget = CharacteristicWidget(device, characteristic)
+                    widget = CharacteristicWidget(device, characteristic, self.scheduler)
 
                     widget.read_button.clicked.connect(self.on_read_button)
                     widget.write_button.clicked.connect(self.on_write_button)
@@ -476,15 +609,19 @@ class ScannerWidget(QWidget): # pragma: no cover
                 if self.devices.itemWidget(item).device.is_connected:
                     self.devices.hide()
                     self.services.clear()
+                    self._service_ids.clear()
                     self.services.show()
                     self.header.label.setText("Services")
                     self.header.button.show()
+                    self.update_layout()
             case self.services:
                 self.services.hide()
                 self.characteristics.clear()
+                self._characteristic_ids.clear()
                 self.characteristics.show()
                 self.header.label.setText("Characteristics")
                 self.header.button.show()
+                self.update_layout()
             case _:
                 pass
 
@@ -504,6 +641,7 @@ class ScannerWidget(QWidget): # pragma: no cover
             self.services.show()
             self.header.button.show()
             self.header.label.setText("Services")
+            self.update_layout() # Services may have been discovered while the characteristics were shown
             return
 
     @typing.no_type_check
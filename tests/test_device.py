@@ -1,125 +1,289 @@
 import os
 import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../src"))
+PATH_TO_SRC = os.path.join(os.path.dirname(__file__), "../src")
+if PATH_TO_SRC not in sys.path: # Both test modules share the same path when run together
+    sys.path.insert(0, PATH_TO_SRC)
 
 import unittest
-
-from device import Characteristic, CharacteristicState, Service, ServiceState, Device
+from unittest.mock import Mock
+
+from device import (
+    Characteristic, CharacteristicState, Service, ServiceState, Device, format_uuid, parse_uuid, shorten_uuid
+)
+
+class TestShortenUUID(unittest.TestCase):
+    def test_shorten_uuid(self):
+        self.assertEqual(shorten_uuid(0x00002A0500001000800000805F9B34FB), 0x2A05)
+        self.assertEqual(shorten_uuid(0x2A05), 0x2A05)
+        self.assertEqual(shorten_uuid(0x12345678_00001000800000805F9B34FB), 0x12345678_00001000800000805F9B34FB)
+        self.assertEqual(shorten_uuid(0x6E400001B5A3F393E0A9E50E24DCCA9E), 0x6E400001B5A3F393E0A9E50E24DCCA9E)
+
+class TestParseUUID(unittest.TestCase):
+    def test_parse_uuid(self):
+        self.assertEqual(parse_uuid(b"\x05\x2A"), 0x2A05)
+        self.assertEqual(parse_uuid(bytes.fromhex("FB349B5F80000080001000000F180000")), 0x180F)
+        self.assertEqual(
+            parse_uuid(bytes.fromhex("9ECADC240EE5A9E093F3A3B50100406E")), 0x6E400001B5A3F393E0A9E50E24DCCA9E
+        )
+
+class TestFormatUUID(unittest.TestCase):
+    def test_format_uuid(self):
+        self.assertEqual(format_uuid(0x180F), "180F")
+        self.assertEqual(format_uuid(0x6E400001B5A3F393E0A9E50E24DCCA9E), "6E400001B5A3F393E0A9E50E24DCCA9E")
+        self.assertEqual(format_uuid(0x0000180F00001000800000805F9B34FB), "0000180F00001000800000805F9B34FB")
 
 class TestCharacteristic(unittest.TestCase):
     def test_create(self):
-        characteristic = Characteristic("ABCD", 1, 2)
+        characteristic = Characteristic(0xABCD, 1, 2)
 
-        self.assertEqual(characteristic.uuid, "ABCD")
+        self.assertEqual(characteristic.uuid, 0xABCD)
         self.assertEqual(characteristic.handle, 1)
+        self.assertEqual(characteristic.handle_str, "[00000001]")
         self.assertEqual(characteristic.properties, 2)
+        self.assertTrue(characteristic.can_read)
+        self.assertFalse(characteristic.can_write)
+        self.assertFalse(characteristic.can_notify)
+        self.assertFalse(characteristic.can_indicate)
         self.assertEqual(characteristic.state, CharacteristicState.NONE)
 
+    def test_observers(self):
+        characteristic = Characteristic(0xABCD, 1, 2)
+        observer = Mock()
+
+        characteristic.add_observer(observer)
+
+        characteristic.state = CharacteristicState.READING
+        characteristic.packet = b"\x12\x34"
+        self.assertEqual(observer.call_count, 2)
+
+        characteristic.remove_observer(observer)
+
+        characteristic.packet = b"\x56\x78"
+        self.assertEqual(observer.call_count, 2)
+
 class TestService(unittest.TestCase):
+    def setUp(self):
+        self.service = Service(0xABCD, 1)
+        self.characteristic = Characteristic(0x1234, 2, 2)
+
     def test_create(self):
-        service = Service("ABCD", 1)
+        self.assertEqual(self.service.uuid, 0xABCD)
+        self.assertEqual(self.service.handle, 1)
+        self.assertEqual(self.service.handle_str, "[00000001]")
+        self.assertListEqual(self.service.characteristics, [])
 
-        self.assertEqual(service.uuid, "ABCD")
-        self.assertEqual(service.handle, 1)
-        self.assertListEqual(service.characteristics, [])
+    def test_add_characteristic(self):
+        characteristic = Characteristic(0x1234, 3, 2)
 
-    def test_get_characteristic_by_uuid(self):
-        service = Service("ABCD", 1)
-        characterstic = Characteristic("1234", 2, 2)
+        self.service.add_characteristic(self.characteristic)
+        self.service.add_characteristic(characteristic)
 
-        service.characteristics.append(characterstic)
+        self.assertListEqual(self.service.characteristics, [self.characteristic, characteristic])
+        self.assertEqual(self.service.get_characteristic_by_uuid(0x1234), self.characteristic) # First one is kept
+        self.assertEqual(self.service.get_characteristic_by_handle(3), characteristic)
 
-        self.assertEqual(service.get_characteristic_by_uuid("1234"), characterstic)
-        self.assertIsNone(service.get_characteristic_by_uuid("5678"))
+    def test_get_characteristic_by_uuid(self):
+        self.service.add_characteristic(self.characteristic)
 
-    def test_get_characteristic_by_handle(self):
-        service = Service("ABCD", 1)
-        characterstic = Characteristic("1234", 2, 2)
+        self.assertEqual(self.service.get_characteristic_by_uuid(0x1234), self.characteristic)
+        self.assertIsNone(self.service.get_characteristic_by_uuid(0x5678))
 
-        service.characteristics.append(characterstic)
+    def test_get_characteristic_by_handle(self):
+        self.service.add_characteristic(self.characteristic)
 
-        self.assertEqual(service.get_characteristic_by_handle(2), characterstic)
-        self.assertIsNone(service.get_characteristic_by_handle(3))
+        self.assertEqual(self.service.get_characteristic_by_handle(2), self.characteristic)
+        self.assertIsNone(self.service.get_characteristic_by_handle(3))
 
 class TestDevice(unittest.TestCase):
-    def test_create(self):
-        device = Device("00:11:22:33:44:55")
+    def setUp(self):
+        self.device = Device("00:11:22:33:44:55")
+        self.service = Service(0xABCD, 1)
+        self.characteristic = Characteristic(0x1234, 2, 2)
 
-        self.assertEqual(device.address, "00:11:22:33:44:55")
-        self.assertIsNone(device.handle)
-        self.assertEqual(device.packet, "")
-        self.assertFalse(device.is_connectable)
-        self.assertIsNone(device.address_type)
-        self.assertIsNone(device.rssi)
+    def test_create(self):
+        self.assertEqual(self.device.address, "00:11:22:33:44:55")
+        self.assertIsNone(self.device.handle)
+        self.assertEqual(self.device.packet, b"")
+        self.assertFalse(self.device.is_connectable)
+        self.assertIsNone(self.device.address_type)
+        self.assertIsNone(self.device.rssi)
 
-        self.assertFalse(device.is_connected)
-        self.assertListEqual(device.services, [])
+        self.assertFalse(self.device.is_connected)
+        self.assertListEqual(self.device.services, [])
 
     def test_on_advertisement(self):
-        device = Device("00:11:22:33:44:55")
+        self.assertTrue(self.device.on_advertisement(b"\xAB\xCD", 1, 1, -100))
 
-        device.on_advertisement("ABCD", 1, 1, -100)
+        self.assertEqual(self.device.packet, b"\xAB\xCD")
+        self.assertTrue(self.device.is_connectable)
+        self.assertEqual(self.device.address_type, 1)
+        self.assertEqual(self.device.rssi, -100)
 
-        self.assertEqual(device.packet, "ABCD")
-        self.assertTrue(device.is_connectable)
-        self.assertEqual(device.address_type, 1)
-        self.assertEqual(device.rssi, -100)
+        self.assertFalse(self.device.on_advertisement(b"\x12\x34", 1, 1, -100)) # The packet is not shown
+        self.assertEqual(self.device.packet, b"\x12\x34")
 
-    def test_get_service_by_uuid(self):
-        device = Device("00:11:22:33:44:55")
-        service = Service("ABCD", 1)
+        self.assertTrue(self.device.on_advertisement(b"\x12\x34", 1, 1, -90))
+        self.assertTrue(self.device.on_advertisement(b"\x12\x34", 0, 1, -90))
 
-        device.services.append(service)
+    def test_add_service(self):
+        self.service.add_characteristic(self.characteristic)
+        self.device.add_service(self.service)
 
-        self.assertEqual(device.get_service_by_uuid("ABCD"), service)
-        self.assertIsNone(device.get_service_by_uuid("1234"))
+        self.assertListEqual(self.device.services, [self.service])
+        self.assertEqual(self.device.get_service_by_handle(1), self.service)
+        self.assertEqual(self.device.get_characteristic_by_handle(2), self.characteristic)
 
-    def test_get_service_by_handle(self):
-        device = Device("00:11:22:33:44:55")
-        service = Service("ABCD", 1)
+    def test_add_characteristic(self):
+        self.device.add_service(self.service)
+        self.device.add_characteristic(self.service, self.characteristic)
 
-        device.services.append(service)
+        self.assertListEqual(self.service.characteristics, [self.characteristic])
+        self.assertEqual(self.device.get_characteristic_by_uuid(0x1234), self.characteristic)
 
-        self.assertEqual(device.get_service_by_handle(1), service)
-        self.assertIsNone(device.get_service_by_handle(2))
+    def test_clear_services(self):
+        self.device.add_service(self.service)
+        self.device.add_characteristic(self.service, self.characteristic)
+        self.device.has_primary_services = True
 
-    def test_get_characteristic_by_uuid(self):
-        device = Device("00:11:22:33:44:55")
-        service = Service("ABCD", 1)
-        characterstic = Characteristic("1234", 2, 2)
+        self.device.clear_services()
 
-        device.services.append(service)
-        service.characteristics.append(characterstic)
+        self.assertListEqual(self.device.services, [])
+        self.assertFalse(self.device.has_primary_services)
+        self.assertIsNone(self.device.get_service_by_handle(1))
+        self.assertIsNone(self.device.get_characteristic_by_handle(2))
+        self.assertFalse(self.device.is_using_gatt_command())
 
-        self.assertEqual(device.get_characteristic_by_uuid("1234"), characterstic)
-        self.assertIsNone(device.get_characteristic_by_uuid("5678"))
+        self.characteristic.state = CharacteristicState.READING # Removed characteristics no longer affect the device
+        self.assertFalse(self.device.is_using_gatt_command())
 
-    def test_get_characteristic_by_handle(self):
-        device = Device("00:11:22:33:44:55")
-        service = Service("ABCD", 1)
-        characterstic = Characteristic("1234", 2, 2)
+    def test_get_service_by_uuid(self):
+        self.device.add_service(self.service)
+
+        self.assertEqual(self.device.get_service_by_uuid(0xABCD), self.service)
+        self.assertIsNone(self.device.get_service_by_uuid(0x1234))
+
+    def test_get_service_by_handle(self):
+        self.device.add_service(self.service)
+
+        self.assertEqual(self.device.get_service_by_handle(1), self.service)
+        self.assertIsNone(self.device.get_service_by_handle(2))
+
+    def test_get_characteristic_by_uuid(self):
+        self.device.add_service(self.service)
+        self.device.add_characteristic(self.service, self.characteristic)
+
+        self.assertEqual(self.device.get_characteristic_by_uuid(0x1234), self.characteristic)
+        self.assertIsNone(self.device.get_characteristic_by_uuid(0x5678))
 
-        device.services.append(service)
-        service.characteristics.append(characterstic)
+    def test_get_characteristic_by_handle(self):
+        self.device.add_service(self.service)
+        self.device.add_characteristic(self.service, self.characteristic)
 
-        self.assertEqual(device.get_characteristic_by_handle(2), characterstic)
-        self.assertIsNone(device.get_characteristic_by_handle(3))
+        self.assertEqual(self.device.get_characteristic_by_handle(2), self.characteristic)
+        self.assertIsNone(self.device.get_characteristic_by_handle(3))
 
     def test_is_using_gatt_command(self):
-        device = Device("00:11:22:33:44:55")
-        service = Service("ABCD", 1)
-        characterstic = Characteristic("1234", 2, 2)
+        self.device.add_service(self.service)
+        self.device.add_characteristic(self.service, self.characteristic)
+
+        self.assertTrue(self.device.is_using_gatt_command())
+
+        self.service.state = ServiceState.DISCOVERED
+        self.assertFalse(self.device.is_using_gatt_command())
+
+        self.characteristic.state = CharacteristicState.WRITING
+        self.assertTrue(self.device.is_using_gatt_command())
+
+        self.characteristic.state = CharacteristicState.READING # Switching between commands is still a single command
+        self.characteristic.state = CharacteristicState.NONE
+        self.assertFalse(self.device.is_using_gatt_command())
+
+        other_characteristic = Characteristic(0x5678, 3, 2)
+        other_characteristic.state = CharacteristicState.READING # State changes before being added are still tracked
+        self.device.add_characteristic(self.service, other_characteristic)
+        self.assertTrue(self.device.is_using_gatt_command())
+
+    def test_can_send_gatt_command(self):
+        self.service.state = ServiceState.DISCOVERED
+
+        self.device.add_service(self.service)
+        self.device.add_characteristic(self.service, self.characteristic)
+        self.assertFalse(self.device.can_send_gatt_command(self.characteristic))
+
+        self.device.is_connected = True
+        self.assertTrue(self.device.can_send_gatt_command(self.characteristic))
+        self.assertFalse(self.device.can_send_gatt_command(Characteristic(0x1234, 2, 2))) # Not on the device
+
+        self.characteristic.state = CharacteristicState.READING
+        self.assertFalse(self.device.can_send_gatt_command(self.characteristic))
+
+        self.device.clear_services()
+        self.assertFalse(self.device.can_send_gatt_command(self.characteristic))
+
+    def test_is_discovered(self):
+        self.assertFalse(self.device.is_discovered())
+
+        self.device.add_service(self.service)
+        self.assertFalse(self.device.is_discovered())
+
+        self.service.state = ServiceState.DISCOVERED
+        self.assertTrue(self.device.is_discovered())
+
+        self.device.has_primary_services = True
+        self.device.needs_rediscovery = True
+        self.assertFalse(self.device.is_discovered())
+        self.assertIsNone(self.device.get_resumable_service())
+
+    def test_get_discovering_service(self):
+        service2 = Service(0x1234, 2)
+        service3 = Service(0x5678, 3)
+
+        self.device.add_service(self.service)
+        self.device.add_service(service2)
+        self.assertEqual(self.device.get_discovering_service(), self.service)
+
+        self.service.state = ServiceState.DISCOVERED
+        self.assertEqual(self.device.get_discovering_service(), service2)
+
+        service2.state = ServiceState.DISCOVERED
+        self.assertIsNone(self.device.get_discovering_service())
+
+        self.device.clear_services()
+        self.device.add_service(service3)
+        self.assertEqual(self.device.get_discovering_service(), service3)
+
+    def test_get_resumable_service(self):
+        service2 = Service(0x1234, 2)
+
+        self.device.add_service(self.service)
+        self.device.add_service(service2)
+        self.assertIsNone(self.device.get_resumable_service()) # Interrupted before all services were found
+
+        self.device.has_primary_services = True
+        self.assertEqual(self.device.get_resumable_service(), self.service)
+
+        self.service.state = ServiceState.DISCOVERED
+        self.assertEqual(self.device.get_resumable_service(), service2)
+
+    def test_clear_gatt_commands(self):
+        self.service.state = ServiceState.DISCOVERED
+        self.characteristic.state = CharacteristicState.READING
 
-        device.services.append(service)
-        service.characteristics.append(characterstic)
+        self.device.add_service(self.service)
+        self.device.add_characteristic(self.service, self.characteristic)
+        self.assertTrue(self.device.is_using_gatt_command())
 
-        self.assertTrue(device.is_using_gatt_command())
+        self.device.clear_gatt_commands()
+        self.assertEqual(self.characteristic.state, CharacteristicState.NONE)
+        self.assertFalse(self.device.is_using_gatt_command())
 
-        service.state = ServiceState.DISCOVERED
-        self.assertFalse(device.is_using_gatt_command())
+        other_characteristic = Characteristic(0x5678, 3, 2)
+        self.device.add_characteristic(self.service, other_characteristic)
+        other_characteristic.state = CharacteristicState.WRITING # The command in progress is tracked once it starts
 
-        characterstic.state = CharacteristicState.WRITING
-        self.assertTrue(device.is_using_gatt_command())
+        self.device.clear_gatt_commands()
+        self.assertEqual(other_characteristic.state, CharacteristicState.NONE)
+        self.assertFalse(self.device.is_using_gatt_command())
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,376 +1,509 @@
 import os
 import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../src"))
+PATH_TO_SRC = os.path.join(os.path.dirname(__file__), "../src")
+if PATH_TO_SRC not in sys.path: # Both test modules share the same path when run together
+    sys.path.insert(0, PATH_TO_SRC)
 
+from contextlib import ExitStack
+from types import SimpleNamespace
 import unittest
 from unittest.mock import Mock, patch
 
+from PyQt6.QtWidgets import QApplication
+
 from device import Characteristic, CharacteristicState, Device, Service, ServiceState
-from scanner import ScannerApp
+from scanner import ScannerApp, ScannerWidget, get_port_of_module
+
+class TestGetPortOfModule(unittest.TestCase):
+    @patch(
+        "serial.tools.list_ports.comports", new=lambda: [("COM1", "USB Serial", None), ("COM3", "JLink CDC UART", None)]
+    )
+    def test_get_port_of_module(self):
+        self.assertEqual(get_port_of_module(), "COM3")
+
+    @patch("serial.tools.list_ports.comports", new=lambda: [("COM1", "USB Serial", None)])
+    def test_get_port_of_module_without_kit(self):
+        self.assertRaises(ValueError, get_port_of_module)
 
 class TestScannerApp(unittest.TestCase):
-    @patch("serial.tools.list_ports.comports", return_value=[])
-    def test_create_without_kit(self, _):
-        self.assertRaises(ValueError, ScannerApp)
-
-    @patch("bgapi.BGLib")
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    def test_create_with_kit(self, *_):
-        app = ScannerApp()
-
-        self.assertListEqual(app.devices, [])
-        self.assertFalse(app.is_running.is_set())
-        self.assertFalse(app.is_ready.is_set())
-
-    @patch("bgapi.BGLib")
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    def test_stop(self, *_):
-        app = ScannerApp()
-
-        app.is_running.set()
-        app.stop()
-        self.assertFalse(app.is_running.is_set())
-
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_reboot(self, mock_lib, *_):
-        app = ScannerApp()
-
-        app.reboot()
-        mock_lib.return_value.bt.system.reboot.assert_called_once()
-
-    @patch("bgapi.BGLib")
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    def test_on_advertisement(self, *_):
-        app = ScannerApp()
-
-        event = Mock()
-        event.address = "00:11:22:33:44:55"
-        event.data = b"\x12\x34"
-        event.event_flags = 1
-        event.address_type = 1
-        event.rssi = -100
-
-        app.on_advertisement(event)
-        self.assertEqual(len(app.devices), 1)
-
-        app.on_advertisement(event) # Duplicate event does NOT create a new device
-        self.assertEqual(len(app.devices), 1)
-
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_on_boot(self, mock_lib, *_):
-        app = ScannerApp()
-
-        app.on_boot()
-        self.assertTrue(app.is_ready.is_set())
-        mock_lib.return_value.bt.scanner.start.assert_called_once_with(
-            mock_lib.return_value.bt.scanner.SCAN_PHY_SCAN_PHY_1M_AND_CODED,
-            mock_lib.return_value.bt.scanner.DISCOVER_MODE_DISCOVER_GENERIC,
+    @classmethod
+    def setUpClass(cls):
+        cls.patches = ExitStack()
+        cls.mock_lib = cls.patches.enter_context(patch("bgapi.BGLib"))
+
+        # Only the calls made to BGLib are checked, so the port and connector are plain stubs rather than mocks
+        cls.patches.enter_context(patch("bgapi.SerialConnector", new=lambda port, rtscts: None))
+        cls.patches.enter_context(
+            patch("serial.tools.list_ports.comports", new=lambda: [("COM1", "JLink CDC UART", None)])
         )
 
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_on_connection_opened(self, mock_lib, *_):
-        app = ScannerApp()
+    @classmethod
+    def tearDownClass(cls):
+        cls.patches.close()
+
+    def setUp(self):
+        self.app = ScannerApp()
+        self.mock_lib.reset_mock()
+
+    def test_create_without_kit(self):
+        with patch("serial.tools.list_ports.comports", new=lambda: []):
+            self.assertRaises(ValueError, ScannerApp)
+
+    def test_create_with_kit(self):
+        self.assertListEqual(self.app.devices, [])
+        self.assertFalse(self.app.is_running.is_set())
+        self.assertFalse(self.app.is_ready.is_set())
+
+    def test_stop(self):
+        self.app.is_running.set()
+        self.app.stop()
+        self.assertFalse(self.app.is_running.is_set())
+        self.mock_lib.return_value.event_queue.put.assert_called_once_with(None)
+
+    def test_handle_event(self):
+        event = SimpleNamespace(
+            _str="bt_evt_scanner_legacy_advertisement_report",
+            address="00:11:22:33:44:55",
+            data=b"\x12\x34",
+            event_flags=1,
+            address_type=1,
+            rssi=-100
+        )
+
+        self.app.handle_event(event) # Events are ignored until the kit has booted
+        self.assertEqual(len(self.app.devices), 0)
+
+        boot_event = SimpleNamespace(_str="bt_evt_system_boot")
+
+        self.app.handle_event(boot_event)
+        self.assertTrue(self.app.is_ready.is_set())
+
+        self.app.handle_event(event)
+        self.assertEqual(len(self.app.devices), 1)
+
+    def test_reboot(self):
+        self.app.reboot()
+        self.mock_lib.return_value.bt.system.reboot.assert_called_once()
+
+    def test_on_advertisement(self):
+        device_added = Mock()
+        device_changed = Mock()
+
+        self.app.signals.device_added.connect(device_added)
+        self.app.signals.device_changed.connect(device_changed)
+
+        event = SimpleNamespace(address="aa:bb:cc:dd:ee:ff", data=b"\x12\x34", event_flags=1, address_type=1, rssi=-100)
+
+        self.app.on_advertisement(event)
+        self.assertEqual(len(self.app.devices), 1)
+
+        self.app.on_advertisement(event) # Duplicate event does NOT create a new device
+        self.assertEqual(len(self.app.devices), 1)
+        device_added.assert_called_once_with(self.app.devices[0])
+        self.assertEqual(self.app.get_device_by_address("aa:bb:cc:dd:ee:ff"), self.app.devices[0])
+        device_changed.assert_called_once_with(self.app.devices[0]) # The duplicate event does not change the device
+
+        event.rssi = -90
+        self.app.on_advertisement(event)
+        self.assertEqual(device_changed.call_count, 2)
+
+    def test_on_boot(self):
+        scanner = self.mock_lib.return_value.bt.scanner
+
+        self.app.on_boot()
+        self.assertTrue(self.app.is_ready.is_set())
+        scanner.start.assert_called_once_with(
+            scanner.SCAN_PHY_SCAN_PHY_1M_AND_CODED,
+            scanner.DISCOVER_MODE_DISCOVER_GENERIC,
+        )
+
+    def test_on_connection_opened(self):
         device = Device("00:11:22:33:44:55")
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        event = Mock()
-        event.address = "00:11:22:33:44:55"
-        event.connection = 1
+        event = SimpleNamespace(address="00:11:22:33:44:55", connection=1)
+        gatt = self.mock_lib.return_value.bt.gatt
 
-        app.on_connection_opened(event)
+        self.app.on_connection_opened(event)
         self.assertTrue(device.is_connected)
-        mock_lib.return_value.bt.gatt.discover_primary_services.assert_called_once_with(1)
+        gatt.discover_primary_services.assert_called_once_with(1)
+
+        service = Service(0x0000, 1)
+        service.state = ServiceState.DISCOVERED
+        device.add_service(service)
+        device.has_primary_services = True
+
+        self.app.on_connection_opened(event) # Services are kept from the previous connection
+        gatt.discover_primary_services.assert_called_once_with(1)
+
+        device.add_service(Service(0x0001, 2))
+
+        self.app.on_connection_opened(event) # Interrupted discoveries resume from the remaining services
+        gatt.discover_primary_services.assert_called_once_with(1)
+        gatt.discover_characteristics.assert_called_once_with(1, 2)
+
+        device.needs_rediscovery = True
 
-    @patch("bgapi.BGLib")
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    def test_on_connection_closed(self, *_):
-        app = ScannerApp()
+        self.app.on_connection_opened(event) # A changed database is discovered again rather than resumed
+        self.assertListEqual(device.services, [])
+        self.assertEqual(gatt.discover_primary_services.call_count, 2)
+        gatt.discover_characteristics.assert_called_once_with(1, 2)
+
+    def test_on_connection_closed(self):
         device = Device("00:11:22:33:44:55")
+        service = Service(0x0000, 1)
+        characteristic = Characteristic(0x0001, 2, 0x02)
 
         device.handle = 1
         device.is_connected = True
+        device.add_service(service)
+        device.add_characteristic(service, characteristic)
+        characteristic.state = CharacteristicState.READING
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        event = Mock()
-        event.connection = 1
+        event = SimpleNamespace(connection=1)
 
-        app.on_connection_closed(event)
+        self.app.on_connection_closed(event)
         self.assertFalse(device.is_connected)
         self.assertIsNone(device.handle)
+        self.assertIsNone(self.app.get_device_by_handle(1))
+        self.assertEqual(characteristic.state, CharacteristicState.NONE)
 
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_on_characteristic_value(self, mock_lib, *_):
-        app = ScannerApp()
+    def test_on_characteristic_value(self):
         device = Device("00:11:22:33:44:55")
-        service = Service("0000", 1)
-        characteristic = Characteristic("0001", 2, 0x20)
+        service = Service(0x0000, 1)
+        characteristic = Characteristic(0x0001, 2, 0x20)
 
         device.handle = 1
-        device.services.append(service)
-        service.characteristics.append(characteristic)
-
-        app.devices.append(device)
-
-        event = Mock()
-        event.att_opcode = mock_lib.return_value.bt.gatt.ATT_OPCODE_HANDLE_VALUE_INDICATION
-        event.connection = 1
-        event.characteristic = 2
-        event.value = b"\x12\x34"
-
-        app.on_characteristic_value(event)
-        mock_lib.return_value.bt.gatt.send_characteristic_confirmation.assert_called_once_with(1)
-        self.assertEqual(characteristic.packet, "1234")
-
-    @patch("bgapi.BGLib")
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    def test_on_service(self, *_):
-        app = ScannerApp()
+        device.add_service(service)
+        device.add_characteristic(service, characteristic)
+
+        self.app.add_device(device)
+
+        event = SimpleNamespace(
+            att_opcode=self.mock_lib.return_value.bt.gatt.ATT_OPCODE_HANDLE_VALUE_INDICATION,
+            connection=1,
+            characteristic=2,
+            value=b"\x12\x34"
+        )
+
+        self.app.on_characteristic_value(event)
+        self.mock_lib.return_value.bt.gatt.send_characteristic_confirmation.assert_called_once_with(1)
+        self.assertEqual(characteristic.packet, b"\x12\x34")
+
+    def test_on_service_changed(self):
         device = Device("00:11:22:33:44:55")
+        service = Service(0x1801, 1)
+        characteristic = Characteristic(0x2A05, 2, 0x20)
 
+        service.state = ServiceState.DISCOVERED
         device.handle = 1
+        device.add_service(service)
+        device.add_characteristic(service, characteristic)
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        event = Mock()
-        event.connection = 1
-        event.uuid = b"\xCD\xAB"
-        event.service = 1
+        services_cleared = Mock()
+        self.app.signals.services_cleared.connect(services_cleared)
 
-        app.on_service(event)
-        self.assertEqual(len(device.services), 1)
-        self.assertEqual(device.services[0].uuid, "ABCD")
-        self.assertEqual(device.services[0].handle, 1)
+        event = SimpleNamespace(
+            att_opcode=self.mock_lib.return_value.bt.gatt.ATT_OPCODE_HANDLE_VALUE_INDICATION,
+            connection=1,
+            characteristic=2,
+            value=b"\x01\x00\xFF\xFF"
+        )
+
+        self.app.on_characteristic_value(event)
+        self.assertListEqual(device.services, [])
+        services_cleared.assert_called_once_with(device)
+        self.mock_lib.return_value.bt.gatt.discover_primary_services.assert_called_once_with(1)
 
-    @patch("bgapi.BGLib")
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    def test_on_characteristic(self, *_):
-        app = ScannerApp()
+    def test_on_service_changed_during_command(self):
         device = Device("00:11:22:33:44:55")
-        service = Service("0000", 1)
+        service = Service(0x1801, 1)
+        characteristic = Characteristic(0x2A05, 2, 0x22)
+        gatt = self.mock_lib.return_value.bt.gatt
 
+        service.state = ServiceState.DISCOVERED
+        characteristic.state = CharacteristicState.READING
         device.handle = 1
-        device.services.append(service)
+        device.has_primary_services = True
+        device.add_service(service)
+        device.add_characteristic(service, characteristic)
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        event = Mock()
-        event.connection = 1
-        event.uuid = b"\xCD\xAB"
-        event.characteristic = 2
-        event.properties = 0x02
+        event = SimpleNamespace(
+            att_opcode=gatt.ATT_OPCODE_HANDLE_VALUE_INDICATION,
+            connection=1,
+            characteristic=2,
+            value=b"\x01\x00\xFF\xFF"
+        )
 
-        app.on_characteristic(event)
-        self.assertEqual(len(service.characteristics), 1)
-        self.assertEqual(service.characteristics[0].uuid, "ABCD")
-        self.assertEqual(service.characteristics[0].handle, 2)
-        self.assertEqual(service.characteristics[0].properties, 0x02)
+        self.app.on_characteristic_value(event) # The discovery waits for the read to complete
+        self.assertListEqual(device.services, [service])
+        self.assertTrue(device.needs_rediscovery)
+        gatt.discover_primary_services.assert_not_called()
 
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_on_procedure_completed(self, mock_lib, *_):
-        app = ScannerApp()
+        self.app.on_procedure_completed(SimpleNamespace(connection=1))
+        self.assertListEqual(device.services, [])
+        self.assertFalse(device.needs_rediscovery)
+        self.assertEqual(characteristic.state, CharacteristicState.NONE)
+        gatt.discover_primary_services.assert_called_once_with(1)
+
+    def test_on_service(self):
         device = Device("00:11:22:33:44:55")
-        service1 = Service("0000", 1)
-        service2 = Service("0001", 2)
 
         device.handle = 1
-        device.services.append(service1)
-        device.services.append(service2)
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        event = Mock()
-        event.connection = 1
+        event = SimpleNamespace(connection=1, uuid=b"\xCD\xAB", service=1)
 
-        app.on_procedure_completed(event)
-        self.assertEqual(service1.state, ServiceState.DISCOVERED)
-        self.assertEqual(service2.state, ServiceState.DISCOVERING)
-        mock_lib.return_value.bt.gatt.discover_characteristics.assert_called_once_with(1, 2)
+        self.app.on_service(event)
+        self.assertEqual(len(device.services), 1)
+        self.assertEqual(device.services[0].uuid, 0xABCD)
+        self.assertEqual(device.services[0].handle, 1)
 
-        app.on_procedure_completed(event)
-        self.assertEqual(service2.state, ServiceState.DISCOVERED)
+        event.uuid = bytes.fromhex("FB349B5F8000008000100000CDAB0000") # 0000ABCD-0000-1000-8000-00805F9B34FB
+        event.service = 2
 
-        characteristic = Characteristic("ABCD", 3, 0x02)
-        characteristic.state = CharacteristicState.READING
-        service1.characteristics.append(characteristic)
-        app.on_procedure_completed(event)
-        self.assertEqual(characteristic.state, CharacteristicState.NONE)
+        self.app.on_service(event)
+        self.assertEqual(device.services[1].uuid, 0xABCD)
 
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_connect_device(self, mock_lib, *_):
-        app = ScannerApp()
+    def test_on_characteristic(self):
         device = Device("00:11:22:33:44:55")
-
-        app.devices.append(device)
+        service = Service(0x0000, 1)
 
         device.handle = 1
-        device.is_connected = False
-        app.connect_device(device)
-        mock_lib.return_value.bt.connection.open.assert_not_called()
+        device.add_service(service)
 
-        device.handle = None
-        device.is_connected = False
-        device.address_type = 1
-        app.connect_device(device)
-        mock_lib.return_value.bt.connection.open.assert_called_once_with(
-            "00:11:22:33:44:55",
-            1,
-            mock_lib.return_value.bt.gap.PHY_PHY_1M
-        )
+        self.app.add_device(device)
 
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_disconnect_device(self, mock_lib, *_):
-        app = ScannerApp()
-        device = Device("00:11:22:33:44:55")
+        services_changed = Mock()
+        self.app.signals.services_changed.connect(services_changed)
 
-        device.handle = 1
+        event = SimpleNamespace(connection=1, uuid=b"\xCD\xAB", characteristic=2, properties=0x02)
 
-        app.devices.append(device)
+        self.app.on_characteristic(event)
+        self.assertEqual(len(service.characteristics), 1)
+        self.assertEqual(service.characteristics[0].uuid, 0xABCD)
+        self.assertEqual(service.characteristics[0].handle, 2)
+        self.assertEqual(service.characteristics[0].properties, 0x02)
 
-        app.disconnect_device(device)
-        mock_lib.return_value.bt.connection.close.assert_called_once_with(1)
+        self.app.on_characteristic(event) # Duplicate event does NOT create a new characteristic
+        self.assertEqual(len(service.characteristics), 1)
+        services_changed.assert_called_once_with(device)
 
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_read_from_characteristic(self, mock_lib, *_):
-        app = ScannerApp()
+    def test_on_procedure_completed(self):
         device = Device("00:11:22:33:44:55")
-        service = Service("0000", 1)
-        service.state = ServiceState.DISCOVERED
-        characteristic = Characteristic("0001", 2, 0x02)
+        service1 = Service(0x0000, 1)
+        service2 = Service(0x0001, 2)
 
-        device.is_connected = True
         device.handle = 1
-        device.services.append(service)
-        service.characteristics.append(characteristic)
+        device.add_service(service1)
+        device.add_service(service2)
+
+        self.app.add_device(device)
+
+        event = SimpleNamespace(connection=1)
+        gatt = self.mock_lib.return_value.bt.gatt
 
-        app.devices.append(device)
+        self.app.on_procedure_completed(event) # Primary services found, the first service is discovered next
+        self.assertTrue(device.has_primary_services)
+        self.assertEqual(service1.state, ServiceState.DISCOVERING)
+        gatt.discover_characteristics.assert_called_once_with(1, 1)
 
-        app.read_from_characteristic(device, characteristic)
-        mock_lib.return_value.bt.gatt.read_characteristic_value.assert_called_once_with(1, 2)
-        self.assertEqual(characteristic.state, CharacteristicState.READING)
+        self.app.on_procedure_completed(event)
+        self.assertEqual(service1.state, ServiceState.DISCOVERED)
+        self.assertEqual(service2.state, ServiceState.DISCOVERING)
+        gatt.discover_characteristics.assert_called_with(1, 2)
+
+        self.app.on_procedure_completed(event)
+        self.assertEqual(service2.state, ServiceState.DISCOVERED)
+        self.assertEqual(gatt.discover_characteristics.call_count, 2)
 
-        app.read_from_characteristic(device, characteristic)
-        mock_lib.return_value.bt.gatt.read_characteristic_value.assert_called_once_with(1, 2)
+        characteristic = Characteristic(0xABCD, 3, 0x02)
+        characteristic.state = CharacteristicState.READING
+        device.add_characteristic(service1, characteristic)
+        self.app.on_procedure_completed(event)
+        self.assertEqual(characteristic.state, CharacteristicState.NONE)
 
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_write_to_characteristic(self, mock_lib, *_):
-        app = ScannerApp()
+    def test_subscribe_to_service_changed(self):
         device = Device("00:11:22:33:44:55")
-        service = Service("0000", 1)
-        service.state = ServiceState.DISCOVERED
-        characteristic = Characteristic("0001", 2, 0x08)
+        service = Service(0x1801, 1)
+        characteristic = Characteristic(0x2A05, 2, 0x20)
+        gatt = self.mock_lib.return_value.bt.gatt
 
-        device.is_connected = True
         device.handle = 1
-        device.services.append(service)
-        service.characteristics.append(characteristic)
+        device.is_connected = True
+        device.has_primary_services = True
+        device.add_service(service)
+        device.add_characteristic(service, characteristic)
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        app.write_to_characteristic(device, characteristic, "ABCD")
-        mock_lib.return_value.bt.gatt.write_characteristic_value.assert_called_once_with(1, 2, b"\xAB\xCD")
-        self.assertEqual(characteristic.state, CharacteristicState.WRITING)
+        self.app.on_procedure_completed(SimpleNamespace(connection=1)) # The last service has been discovered
+        gatt.set_characteristic_notification.assert_called_once_with(1, 2, 2)
+        self.assertEqual(characteristic.state, CharacteristicState.SUBSCRIBING_INDICATION)
 
-        app.write_to_characteristic(device, characteristic, "ABCD")
-        mock_lib.return_value.bt.gatt.write_characteristic_value.assert_called_once_with(1, 2, b"\xAB\xCD")
+        self.app.on_procedure_completed(SimpleNamespace(connection=1))
+        self.assertEqual(characteristic.state, CharacteristicState.NONE)
+        gatt.set_characteristic_notification.assert_called_once_with(1, 2, 2)
 
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_subscribe_to_notification(self, mock_lib, *_):
-        app = ScannerApp()
-        device = Device("00:11:22:33:44:55")
-        service = Service("0000", 1)
-        service.state = ServiceState.DISCOVERED
-        characteristic = Characteristic("0001", 2, 0x10)
+        self.app.on_connection_opened(SimpleNamespace(address="00:11:22:33:44:55", connection=1))
+        self.assertEqual(gatt.set_characteristic_notification.call_count, 2) # Made again on every connection
+        gatt.discover_primary_services.assert_not_called()
 
-        device.is_connected = True
-        device.handle = 1
-        device.services.append(service)
-        service.characteristics.append(characteristic)
+    def test_connect_device(self):
+        device = Device("00:11:22:33:44:55")
+        bt = self.mock_lib.return_value.bt
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        app.subscribe_to_notification(device, characteristic)
-        mock_lib.return_value.bt.gatt.set_characteristic_notification.assert_called_once_with(1, 2, 1)
-        self.assertEqual(characteristic.state, CharacteristicState.SUBSCRIBING_NOTIFICATION)
+        device.handle = 1
+        device.is_connected = False
+        self.app.connect_device(device)
+        bt.connection.open.assert_not_called()
 
-        app.subscribe_to_notification(device, characteristic)
-        mock_lib.return_value.bt.gatt.set_characteristic_notification.assert_called_once_with(1, 2, 1)
+        device.handle = None
+        device.is_connected = False
+        device.address_type = 1
+        self.app.connect_device(device)
+        bt.connection.open.assert_called_once_with("00:11:22:33:44:55", 1, bt.gap.PHY_PHY_1M)
+        self.assertEqual(self.app.get_device_by_handle(device.handle), device)
 
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    @patch("bgapi.BGLib")
-    def test_subscribe_to_indication(self, mock_lib, *_):
-        app = ScannerApp()
+    def test_disconnect_device(self):
         device = Device("00:11:22:33:44:55")
-        service = Service("0000", 1)
-        service.state = ServiceState.DISCOVERED
-        characteristic = Characteristic("0001", 2, 0x10)
 
-        device.is_connected = True
         device.handle = 1
-        device.services.append(service)
-        service.characteristics.append(characteristic)
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        app.subscribe_to_indication(device, characteristic)
-        mock_lib.return_value.bt.gatt.set_characteristic_notification.assert_called_once_with(1, 2, 2)
-        self.assertEqual(characteristic.state, CharacteristicState.SUBSCRIBING_INDICATION)
+        self.app.disconnect_device(device)
+        self.mock_lib.return_value.bt.connection.close.assert_called_once_with(1)
 
-        app.subscribe_to_indication(device, characteristic)
-        mock_lib.return_value.bt.gatt.set_characteristic_notification.assert_called_once_with(1, 2, 2)
+    def test_gatt_commands(self):
+        device = Device("00:11:22:33:44:55")
+        service = Service(0x0000, 1)
+        service.state = ServiceState.DISCOVERED
+        characteristic = Characteristic(0x0001, 2, 0x02 | 0x08 | 0x10 | 0x20)
 
-    @patch("bgapi.BGLib")
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    def test_get_device_by_address(self, *_):
-        app = ScannerApp()
+        device.is_connected = True
+        device.handle = 1
+        device.add_service(service)
+        device.add_characteristic(service, characteristic)
+
+        self.app.add_device(device)
+
+        gatt = self.mock_lib.return_value.bt.gatt
+        cases = [
+            (self.app.read_from_characteristic, (), gatt.read_characteristic_value, (1, 2),
+                CharacteristicState.READING),
+            (self.app.write_to_characteristic, (b"\xAB\xCD",), gatt.write_characteristic_value, (1, 2, b"\xAB\xCD"),
+                CharacteristicState.WRITING),
+            (self.app.subscribe_to_notification, (), gatt.set_characteristic_notification, (1, 2, 1),
+                CharacteristicState.SUBSCRIBING_NOTIFICATION),
+            (self.app.subscribe_to_indication, (), gatt.set_characteristic_notification, (1, 2, 2),
+                CharacteristicState.SUBSCRIBING_INDICATION)
+        ]
+
+        for method, args, command, command_args, state in cases:
+            with self.subTest(method=method.__name__):
+                characteristic.state = CharacteristicState.NONE
+                self.mock_lib.reset_mock()
+
+                method(device, characteristic, *args)
+                command.assert_called_once_with(*command_args)
+                self.assertEqual(characteristic.state, state)
+
+                method(device, characteristic, *args) # Ignored while the first command is pending
+                command.assert_called_once_with(*command_args)
+
+        self.assertEqual(characteristic.packet, b"\xAB\xCD")
+
+        characteristic.state = CharacteristicState.NONE
+        device.clear_services()
+        device.add_service(Service(0x0000, 1))
+        self.mock_lib.reset_mock()
+
+        self.app.read_from_characteristic(device, characteristic) # Cleared characteristics are no longer on the device
+        gatt.read_characteristic_value.assert_not_called()
+
+    def test_get_device_by_address(self):
         device = Device("00:11:22:33:44:55")
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        self.assertEqual(app.get_device_by_address("00:11:22:33:44:55"), device)
-        self.assertIsNone(app.get_device_by_address("66:77:88:99:AA:BB"))
+        self.assertEqual(self.app.get_device_by_address("00:11:22:33:44:55"), device)
+        self.assertIsNone(self.app.get_device_by_address("66:77:88:99:AA:BB"))
 
-    @patch("bgapi.BGLib")
-    @patch("bgapi.SerialConnector")
-    @patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
-    def test_get_device_by_handle(self, *_):
-        app = ScannerApp()
+    def test_get_device_by_handle(self):
         device = Device("00:11:22:33:44:55")
         device.handle = 1
 
-        app.devices.append(device)
+        self.app.add_device(device)
 
-        self.assertEqual(app.get_device_by_handle(1), device)
-        self.assertIsNone(app.get_device_by_handle(2))
+        self.assertEqual(self.app.get_device_by_handle(1), device)
+        self.assertIsNone(self.app.get_device_by_handle(2))
+
+class TestScannerWidget(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen") # The widgets are shown without needing a display
+        cls.qt_app = QApplication.instance() or QApplication([])
+
+        cls.patches = ExitStack()
+        cls.patches.enter_context(patch("bgapi.BGLib"))
+        cls.patches.enter_context(patch("bgapi.SerialConnector", new=lambda port, rtscts: None))
+        cls.patches.enter_context(
+            patch("serial.tools.list_ports.comports", new=lambda: [("COM1", "JLink CDC UART", None)])
+        )
+        cls.patches.enter_context(patch("scanner.ScannerApp.run", new=lambda self: None))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.patches.close()
+
+    def setUp(self):
+        self.widget = ScannerWidget()
+        self.device = Device("00:11:22:33:44:55")
+        self.service = Service(0x0000, 1)
+
+        self.service.state = ServiceState.DISCOVERED
+        self.device.is_connected = True
+        self.device.handle = 1
+        self.device.add_service(self.service)
+        self.device.add_characteristic(self.service, Characteristic(0x0001, 2, 0x02))
+
+        self.widget.app.add_device(self.device)
+        self.widget.show()
+
+    def tearDown(self):
+        self.widget.close()
+        self.widget.deleteLater()
+
+    def test_on_services_cleared(self):
+        self.widget.devices.setCurrentRow(0)
+        self.widget.devices.itemClicked.emit(self.widget.devices.item(0))
+        self.widget.services.setCurrentRow(0)
+        self.widget.services.itemClicked.emit(self.widget.services.item(0))
+        self.assertEqual(self.widget.characteristics.count(), 1)
+
+        self.device.clear_services()
+        self.widget.on_services_cleared(self.device)
+
+        self.assertTrue(self.widget.services.isVisible()) # The removed service can no longer be shown
+        self.assertFalse(self.widget.characteristics.isVisible())
+        self.assertEqual(self.widget.services.count(), 0)
+        self.assertEqual(self.widget.characteristics.count(), 0)
+
+        self.device.add_service(Service(0x0001, 3))
+        self.widget.update_layout()
+        self.assertEqual(self.widget.services.count(), 1)
+        self.assertIsNot(self.widget.services.itemWidget(self.widget.services.item(0)).service, self.service)
 
 if __name__ == "__main__":
     unittest.main()
@@ -3,6 +3,8 @@ import sys
 import unittest
 
 if __name__ == "__main__":
+    sys.dont_write_bytecode = True # The modules are imported once per run, caching their bytecode only costs writes
+
     suite = unittest.TestSuite()
 
     path_to_tests = os.path.join(os.path.dirname(__file__), "../tests")
@@ -14,40 +14,51 @@ NUM_DEVICES = 50
 NUM_SERVICES_PER_DEVICE = 15
 NUM_CHARACTERISTICS_PER_SERVICE = 10
 
-def create_devices() -> list[Device]:
-    """Create a list of fake Devices/Services/Characteristics"""
+def create_uuid(rng: random.Random) -> int:
+    """Create a random 16-bit or 128-bit UUID, only drawing the bits of the chosen size"""
 
-    devices = [Device(":".join(f"{random.randrange(256):02X}" for _ in range(6))) for _ in range(NUM_DEVICES)]
+    return rng.getrandbits(16 if rng.getrandbits(1) else 128)
+
+def create_devices(seed: int | None = None) -> list[Device]:
+    """Create a list of fake Devices/Services/Characteristics, repeatable when given a seed"""
+
+    rng = random.Random(seed)
+    randrange = rng.randrange
+
+    addresses = rng.randbytes(6*NUM_DEVICES)
+    devices = [Device(addresses[i:i + 6].hex(":")) for i in range(0, 6*NUM_DEVICES, 6)]
     has_connecting = False
 
-    for device in devices:
-        device.rssi = random.randrange(-120, -20)
-        device.is_connectable = random.choice([True, False])
+    # One random bit per device for each of its flags
+    is_connectable = rng.getrandbits(NUM_DEVICES)
+    is_connected = rng.getrandbits(NUM_DEVICES)
+    is_connecting = rng.getrandbits(NUM_DEVICES)
+
+    for i, device in enumerate(devices):
+        device.rssi = randrange(-120, -20)
+        device.is_connectable = is_connectable >> i & 1 == 1
 
         if device.is_connectable:
-            device.is_connected = random.choice([True, False])
+            device.is_connected = is_connected >> i & 1 == 1
 
         if device.is_connected:
-            device.services = [
-                Service(
-                    random.choice([f"{random.randrange(2**16):04X}", f"{random.randrange(2**128):016X}"]),
-                    random.randrange(2**32)
-                ) for _ in range(NUM_SERVICES_PER_DEVICE)
-            ]
-
             handle = 1
 
-            for service in device.services:
-                service.handle = handle
-                service.characteristics = [
-                    Characteristic(
-                        random.choice([f"{random.randrange(2**16):04X}", f"{random.randrange(2**128):016X}"]),
-                        handle := handle + 1,
-                        random.randrange(8) << 3 | random.randrange(1) << 1
-                    ) for _ in range(NUM_CHARACTERISTICS_PER_SERVICE)
-                ]
+            for _ in range(NUM_SERVICES_PER_DEVICE):
+                service = Service(create_uuid(rng), handle)
+
+                for _ in range(NUM_CHARACTERISTICS_PER_SERVICE):
+                    service.add_characteristic(
+                        Characteristic(
+                            create_uuid(rng),
+                            handle := handle + 1,
+                            randrange(8) << 3 | randrange(1) << 1
+                        )
+                    )
+
+                device.add_service(service)
         elif not has_connecting and device.is_connectable:
-            device.handle = random.choice([None, 1])
+            device.handle = 1 if is_connecting >> i & 1 else None
             has_connecting = True
 
     return devices
@@ -55,6 +66,12 @@ def create_devices() -> list[Device]:
 def main() -> None:
     """Create the fake GUI for quick widget graphical debugging"""
 
+    # Headless runs only check that the widgets can be built, so no display or event loop is needed
+    is_headless = os.environ.get("AQUAMARINE_HEADLESS") == "1"
+
+    if is_headless:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
     app = QApplication(sys.argv)
 
     with (
@@ -64,7 +81,13 @@ def main() -> None:
         patch("serial.tools.list_ports.comports", return_value=[("COM1", "JLink CDC UART", None)])
     ):
         window = ScannerWidget()
-        window.app.devices = create_devices()
+
+        for device in create_devices():
+            window.app.add_device(device)
+
+        if is_headless:
+            return
+
         window.show()
 
     sys.exit(app.exec())